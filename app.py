@@ -1,13 +1,13 @@
 import os
 import requests
-from flask import Flask, render_template, request, redirect, url_for, flash, send_file, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, send_file, jsonify, abort, Response
 from dotenv import load_dotenv
 from database import db, UserPreference, Newsletter, User, AdminConfig
-from news_fetcher import fetch_news
+from article_store import get_news, start_ingester, ARTICLE_INGEST_INTERVAL
+from feed_registry import registry
 from summarizer import summarize_articles, generate_overall_summary
-from pdf_generator import generate_pdf
-from audio_generator import generate_audio
-from email_sender import send_newsletter_email, create_newsletter_email_body, is_smtp_configured
+from artifacts import edition_content, render_artifact, rendered_path, prepare_artifacts, stream_audio_artifact
+from email_sender import SMTPSession, send_newsletter_email, create_newsletter_email_body, is_smtp_configured
 from datetime import datetime
 import re
 
@@ -28,6 +28,11 @@ with app.app_context():
         db.session.commit()
     except Exception:
         db.session.rollback()
+    try:
+        db.session.execute(db.text('ALTER TABLE newsletters ADD COLUMN content TEXT'))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
 
 def validate_email(email):
     """Validate email format."""
@@ -45,12 +50,6 @@ def sanitize_input(text):
         return ''
     return text.replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
 
-def build_public_url(path):
-    """Create a full URL for static files based on the current request host."""
-    base = request.host_url.rstrip('/')
-    clean_path = path.lstrip('/')
-    return f"{base}/{clean_path}"
-
 def send_whatsapp_via_service(phone_number, message):
     """Send WhatsApp text message through the local WhatsApp service."""
     service_url = 'http://localhost:3002/send'
@@ -75,24 +74,49 @@ def send_whatsapp_media_via_service(phone_number, file_paths, caption=''):
     except Exception as exc:
         return False, str(exc)
 
-def send_newsletter_to_user(newsletter, user):
-    """Send newsletter to a single user via email and WhatsApp."""
+def artifact_links(newsletter):
+    """Return full download URLs for a newsletter's PDF and MP3 ('' for a missing one)."""
+    pdf_link = url_for('download_pdf', newsletter_id=newsletter.id, _external=True) if newsletter.pdf_path else ''
+    audio_link = url_for('download_audio', newsletter_id=newsletter.id, _external=True) if newsletter.audio_path else ''
+    return pdf_link, audio_link
+
+def email_download_links(newsletter, pdf_file, audio_file):
+    """Links for the versions that aren't attached because they haven't been rendered yet."""
+    pdf_link, audio_link = artifact_links(newsletter)
+    links = []
+    if pdf_link and not pdf_file:
+        links.append(('PDF', pdf_link))
+    if audio_link and not audio_file:
+        links.append(('Audio', audio_link))
+    return links
+
+def send_newsletter_to_user(newsletter, user, smtp_session=None):
+    """Send newsletter to a single user via email and WhatsApp.
+
+    Only files that have already been rendered are attached, so sending
+    never waits on a render; the rest are sent as download links.
+    ``smtp_session`` lets a loop over many users share one SMTP connection.
+    """
     successes = []
     errors = []
+    pdf_file = rendered_path(newsletter, 'pdf')
+    audio_file = rendered_path(newsletter, 'audio')
 
     if is_smtp_configured():
         try:
             email_body = create_newsletter_email_body(
                 newsletter.title,
                 newsletter.overall_summary or '',
-                len(newsletter.topics.split(','))
+                len(newsletter.topics.split(',')),
+                email_download_links(newsletter, pdf_file, audio_file)
             )
             send_newsletter_email(
                 user.email,
                 newsletter.title,
                 email_body,
-                newsletter.pdf_path,
-                newsletter.audio_path
+                pdf_file,
+                audio_file,
+                session=smtp_session
             )
             successes.append('email')
         except Exception as exc:
@@ -100,8 +124,7 @@ def send_newsletter_to_user(newsletter, user):
     else:
         errors.append('SMTP not configured')
 
-    pdf_link = build_public_url(newsletter.pdf_path) if newsletter.pdf_path else ''
-    audio_link = build_public_url(newsletter.audio_path) if newsletter.audio_path else ''
+    pdf_link, audio_link = artifact_links(newsletter)
     message_parts = [
         f"{newsletter.title}",
         newsletter.overall_summary or 'Here is your personalized newsletter.',
@@ -120,11 +143,7 @@ def send_newsletter_to_user(newsletter, user):
         errors.append(f'WhatsApp to {user.whatsapp_number} failed: {err}')
 
     # Send media (PDF and audio) as documents if available
-    media_files = []
-    if newsletter.pdf_path and os.path.exists(newsletter.pdf_path):
-        media_files.append(os.path.abspath(newsletter.pdf_path))
-    if newsletter.audio_path and os.path.exists(newsletter.audio_path):
-        media_files.append(os.path.abspath(newsletter.audio_path))
+    media_files = [os.path.abspath(path) for path in (pdf_file, audio_file) if path]
 
     if media_files:
         ok_media, err_media = send_whatsapp_media_via_service(
@@ -250,11 +269,13 @@ def generate_newsletter():
     try:
         topics = [t.strip() for t in pref.topics.split(',')]
         prompt_text = getattr(pref, 'prompt', '') or ''
-        articles = fetch_news(topics)
+        articles, dropped_feeds = get_news(topics)
         
         if not articles:
             flash('No news articles found for your topics. Try different keywords.', 'warning')
             return redirect(url_for('index'))
+        if dropped_feeds:
+            flash(f'{len(dropped_feeds)} news feed(s) were too slow and were left out of this newsletter.', 'warning')
         
         summarized = summarize_articles(articles, prompt=prompt_text)
         overall_summary = generate_overall_summary(summarized, prompt=prompt_text)
@@ -268,35 +289,33 @@ def generate_newsletter():
         
         os.makedirs(os.path.join('static', 'newsletters'), exist_ok=True)
         
-        generate_pdf(
-            summarized,
-            pdf_path,
-            primary_color=pref.primary_color,
-            secondary_color=pref.secondary_color,
-            font_style=pref.font_style,
-            overall_summary=overall_summary
-        )
-        
-        generate_audio(summarized, audio_path, overall_summary)
-        
         newsletter = Newsletter(
             title=f"Newsletter - {datetime.now().strftime('%B %d, %Y')}",
             topics=pref.topics,
             overall_summary=overall_summary,
             pdf_path=pdf_path,
-            audio_path=audio_path
+            audio_path=audio_path,
+            content=edition_content(
+                summarized,
+                overall_summary,
+                pref.primary_color,
+                pref.secondary_color,
+                pref.font_style
+            )
         )
         db.session.add(newsletter)
         db.session.commit()
+        prepare_artifacts(newsletter)
         
         # Auto-send to all active users (email + WhatsApp)
         successes = []
         errors = []
         active_users = User.query.filter_by(is_active=True).all()
-        for u in active_users:
-            s, e = send_newsletter_to_user(newsletter, u)
-            successes.extend(s)
-            errors.extend(e)
+        with SMTPSession() as smtp_session:
+            for u in active_users:
+                s, e = send_newsletter_to_user(newsletter, u, smtp_session)
+                successes.extend(s)
+                errors.extend(e)
         
         if successes:
             flash(f'Newsletter generated and sent via: {", ".join(set(successes))}', 'success')
@@ -318,11 +337,13 @@ def generate_for_user(user_id):
     try:
         topics = [t.strip() for t in user.topics.split(',')]
         pref_prompt = getattr(UserPreference.query.first(), 'prompt', '') if UserPreference.query.first() else ''
-        articles = fetch_news(topics)
+        articles, dropped_feeds = get_news(topics)
         
         if not articles:
             flash(f'No news articles found for {user.name}\'s topics.', 'warning')
             return redirect(url_for('list_users'))
+        if dropped_feeds:
+            flash(f'{len(dropped_feeds)} news feed(s) were too slow and were left out of this newsletter.', 'warning')
         
         summarized = summarize_articles(articles, prompt=pref_prompt)
         overall_summary = generate_overall_summary(summarized, prompt=pref_prompt)
@@ -336,26 +357,23 @@ def generate_for_user(user_id):
         
         os.makedirs(os.path.join('static', 'newsletters'), exist_ok=True)
         
-        generate_pdf(
-            summarized,
-            pdf_path,
-            primary_color=user.primary_color,
-            secondary_color=user.secondary_color,
-            font_style=user.font_style,
-            overall_summary=overall_summary
-        )
-        
-        generate_audio(summarized, audio_path, overall_summary)
-        
         newsletter = Newsletter(
             title=f"Newsletter for {user.name} - {datetime.now().strftime('%B %d, %Y')}",
             topics=user.topics,
             overall_summary=overall_summary,
             pdf_path=pdf_path,
-            audio_path=audio_path
+            audio_path=audio_path,
+            content=edition_content(
+                summarized,
+                overall_summary,
+                user.primary_color,
+                user.secondary_color,
+                user.font_style
+            )
         )
         db.session.add(newsletter)
         db.session.commit()
+        prepare_artifacts(newsletter)
         
         successes, errors = send_newsletter_to_user(newsletter, user)
         if successes:
@@ -382,26 +400,28 @@ def send_newsletter(newsletter_id, user_id):
     successes = []
     
     if send_email:
+        pdf_file = rendered_path(newsletter, 'pdf')
+        audio_file = rendered_path(newsletter, 'audio')
         try:
             email_body = create_newsletter_email_body(
                 newsletter.title,
                 newsletter.overall_summary or '',
-                len(newsletter.topics.split(','))
+                len(newsletter.topics.split(',')),
+                email_download_links(newsletter, pdf_file, audio_file)
             )
             send_newsletter_email(
                 user.email,
                 newsletter.title,
                 email_body,
-                newsletter.pdf_path,
-                newsletter.audio_path
+                pdf_file,
+                audio_file
             )
             successes.append('Email sent successfully!')
         except Exception as e:
             errors.append(f'Email failed: {str(e)}')
     
     if send_whatsapp:
-        pdf_link = build_public_url(newsletter.pdf_path) if newsletter.pdf_path else ''
-        audio_link = build_public_url(newsletter.audio_path) if newsletter.audio_path else ''
+        pdf_link, audio_link = artifact_links(newsletter)
         message_parts = [
             f"{newsletter.title}",
             newsletter.overall_summary or 'Here is your personalized newsletter.',
@@ -433,15 +453,43 @@ def view_newsletter(newsletter_id):
     smtp_configured = is_smtp_configured()
     return render_template('newsletter.html', newsletter=newsletter, users=users, smtp_configured=smtp_configured)
 
+def send_artifact(newsletter_id, kind):
+    """Serve a newsletter's PDF or MP3, rendering it first if it hasn't been yet."""
+    newsletter = Newsletter.query.get_or_404(newsletter_id)
+    try:
+        path = render_artifact(newsletter, kind)
+    except Exception as e:
+        label = 'PDF' if kind == 'pdf' else 'audio'
+        flash(f'Could not create the {label} file: {str(e)}', 'error')
+        return redirect(url_for('view_newsletter', newsletter_id=newsletter_id))
+    if not path:
+        abort(404)
+    # conditional/etag answer If-None-Match and Range requests so players can seek and resume
+    return send_file(
+        os.path.abspath(path),
+        as_attachment=not request.args.get('inline'),
+        conditional=True,
+        etag=True
+    )
+
 @app.route('/download/pdf/<int:newsletter_id>')
 def download_pdf(newsletter_id):
-    newsletter = Newsletter.query.get_or_404(newsletter_id)
-    return send_file(newsletter.pdf_path, as_attachment=True)
+    return send_artifact(newsletter_id, 'pdf')
 
 @app.route('/download/audio/<int:newsletter_id>')
 def download_audio(newsletter_id):
+    return send_artifact(newsletter_id, 'audio')
+
+@app.route('/stream/audio/<int:newsletter_id>')
+def stream_audio(newsletter_id):
+    """Play a newsletter's audio, starting before the whole edition is synthesized."""
     newsletter = Newsletter.query.get_or_404(newsletter_id)
-    return send_file(newsletter.audio_path, as_attachment=True)
+    path = newsletter.audio_path
+    if path and os.path.exists(path):
+        return send_file(os.path.abspath(path), mimetype='audio/mpeg', conditional=True, etag=True)
+    if not newsletter.content:
+        abort(404)
+    return Response(stream_audio_artifact(newsletter), mimetype='audio/mpeg')
 
 @app.route('/admin')
 def admin():
@@ -455,7 +503,8 @@ def admin():
                           config=config, 
                           users=users, 
                           newsletters=newsletters,
-                          smtp_configured=smtp_configured)
+                          smtp_configured=smtp_configured,
+                          feed_health=registry.snapshot())
 
 @app.route('/admin/delete-user/<int:user_id>', methods=['POST'])
 def delete_user(user_id):
@@ -483,10 +532,18 @@ def preview_news():
         return jsonify({'error': 'No valid topics found'}), 400
     
     try:
-        articles = fetch_news(topic_list, limit=3)
-        return jsonify({'articles': articles})
+        articles, dropped_feeds = get_news(topic_list, limit=3)
+        return jsonify({'articles': articles, 'dropped_feeds': dropped_feeds})
     except Exception as e:
         return jsonify({'error': f'Failed to fetch news: {str(e)}'}), 500
 
+@app.route('/api/feed-health')
+def feed_health():
+    return jsonify({'feeds': registry.snapshot()})
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    debug = True
+    # With the reloader on, only the child process (WERKZEUG_RUN_MAIN set) serves requests
+    if ARTICLE_INGEST_INTERVAL > 0 and (not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+        start_ingester(app)
+    app.run(host='0.0.0.0', port=5000, debug=debug)
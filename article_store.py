@@ -0,0 +1,200 @@
+import os
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from database import db, Article
+from feed_registry import registry
+from news_fetcher import FEED_FETCH_WORKERS, fetch_news_with_status, feeds_for_topics, parse_rss_feed, rank_articles
+from relevance import InvertedIndex, topic_terms
+
+ARTICLE_INGEST_INTERVAL = int(os.environ.get('ARTICLE_INGEST_INTERVAL', 600))
+ARTICLE_MAX_AGE_HOURS = float(os.environ.get('ARTICLE_MAX_AGE_HOURS', 48))
+ARTICLES_PER_FEED = 20
+
+_article_index = None
+_article_index_lock = threading.Lock()
+
+def article_hash(article):
+    """Stable key for an article: its link, or title and summary if it has none."""
+    key = article.get('link') or f"{article.get('title', '')}\n{article.get('summary', '')}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+def article_to_dict(row):
+    """Convert a stored Article row to the dict shape fetch_news returns."""
+    return {
+        'title': row.title,
+        'summary': row.summary or '',
+        'link': row.link or '',
+        'image_url': row.image_url or '',
+        'published': row.published or '',
+        'published_at': row.published_at.isoformat() if row.published_at else None,
+        'source': row.source or 'Unknown Source'
+    }
+
+def store_articles(feed_url, articles):
+    """Insert or refresh articles parsed from one feed. Returns the number of new rows."""
+    if not articles:
+        return 0
+
+    by_hash = {article_hash(a): a for a in articles}
+    existing = {
+        row.content_hash: row
+        for row in Article.query.filter(
+            Article.feed_url == feed_url,
+            Article.content_hash.in_(list(by_hash))
+        ).all()
+    }
+
+    now = datetime.utcnow()
+    added = 0
+    for content_hash, article in by_hash.items():
+        published_at = None
+        if article.get('published_at'):
+            try:
+                published_at = datetime.fromisoformat(article['published_at'])
+            except ValueError:
+                pass
+
+        row = existing.get(content_hash)
+        if row is None:
+            row = Article(content_hash=content_hash, feed_url=feed_url)
+            db.session.add(row)
+            added += 1
+
+        row.link = article.get('link', '')
+        row.title = article.get('title', '')
+        row.summary = article.get('summary', '')
+        row.source = article.get('source', '')
+        row.image_url = article.get('image_url', '')
+        row.published = article.get('published', '')
+        row.published_at = published_at
+        row.fetched_at = now
+
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another ingester stored the same article first; it will be refreshed next cycle
+        db.session.rollback()
+        return 0
+
+    return added
+
+def load_articles(feed_urls, max_age_hours=None):
+    """Load the latest stored articles for the given feeds."""
+    max_age_hours = ARTICLE_MAX_AGE_HOURS if max_age_hours is None else max_age_hours
+    cutoff = datetime.utcnow() - timedelta(hours=max_age_hours)
+
+    articles = []
+    for feed_url in feed_urls:
+        rows = (Article.query
+                .filter(Article.feed_url == feed_url, Article.fetched_at >= cutoff)
+                .order_by(Article.published_at.desc(), Article.id.desc())
+                .limit(ARTICLES_PER_FEED)
+                .all())
+        articles.extend(article_to_dict(row) for row in rows)
+
+    return articles
+
+def prune_articles(max_age_hours=None):
+    """Delete articles no feed has listed for ``max_age_hours``. Returns the number of rows removed."""
+    max_age_hours = ARTICLE_MAX_AGE_HOURS if max_age_hours is None else max_age_hours
+    cutoff = datetime.utcnow() - timedelta(hours=max_age_hours)
+    removed = Article.query.filter(Article.fetched_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    return removed
+
+class StoredArticleIndex:
+    """The latest stored articles of every feed and a relevance index over them, rebuilt per ingest."""
+
+    def __init__(self, feed_urls):
+        self.articles = []
+        self.feed_docs = {}
+        for feed_url in feed_urls:
+            start = len(self.articles)
+            self.articles.extend(load_articles([feed_url]))
+            self.feed_docs[feed_url] = range(start, len(self.articles))
+        self.index = InvertedIndex(self.articles)
+        self.built_at = time.monotonic()
+
+    def rank(self, feed_urls, topics, limit=10):
+        scores = self.index.score(topic_terms(topics))
+        doc_ids = [i for feed_url in feed_urls for i in self.feed_docs.get(feed_url, ())]
+        # Copies, so ranking and summarizing never write into the shared articles
+        articles = [dict(self.articles[i]) for i in doc_ids]
+        return rank_articles(articles, topics, limit, scores=[scores[i] for i in doc_ids])
+
+def refresh_article_index():
+    """Rebuild the shared index from the store. Needs an app context."""
+    global _article_index
+    index = StoredArticleIndex(registry.all_feeds())
+    with _article_index_lock:
+        _article_index = index
+    return index
+
+def get_article_index():
+    """The shared index, rebuilt if no ingest has refreshed it for an ingest interval."""
+    index = _article_index
+    if index is None or time.monotonic() - index.built_at > ARTICLE_INGEST_INTERVAL:
+        index = refresh_article_index()
+    return index
+
+def fetch_stored_news(topics, limit=10):
+    """Rank stored articles for the given topics without touching the network."""
+    return get_article_index().rank(feeds_for_topics(topics), topics, limit)
+
+def get_news(topics, limit=10, deadline=None):
+    """Return articles for topics from the store, falling back to a live fetch.
+
+    Returns ``(articles, dropped_feeds)``; ``dropped_feeds`` lists feeds a
+    live fetch gave up on because they missed the ``deadline``.
+    """
+    if ARTICLE_INGEST_INTERVAL > 0:
+        articles = fetch_stored_news(topics, limit)
+        if articles:
+            return articles, []
+    return fetch_news_with_status(topics, limit, deadline=deadline)
+
+def ingest_feeds():
+    """Fetch every known feed once, store its articles, prune expired ones and reindex.
+
+    Returns the number of new rows.
+    """
+    feed_urls = registry.all_feeds()
+
+    with ThreadPoolExecutor(max_workers=FEED_FETCH_WORKERS) as executor:
+        results = list(executor.map(lambda url: parse_rss_feed(url, []), feed_urls))
+
+    added = 0
+    for feed_url, articles in zip(feed_urls, results):
+        added += store_articles(feed_url, articles)
+
+    removed = prune_articles()
+    if removed:
+        print(f"Pruned {removed} expired articles")
+    refresh_article_index()
+    return added
+
+def start_ingester(app, interval=None):
+    """Start a daemon thread that ingests all feeds every ``interval`` seconds.
+
+    Call this once per server process: two ingesters polling into the same
+    SQLite file race on inserts and drop each other's batches.
+    """
+    interval = ARTICLE_INGEST_INTERVAL if interval is None else interval
+
+    def run():
+        while True:
+            try:
+                with app.app_context():
+                    added = ingest_feeds()
+                print(f"Article ingest finished: {added} new articles")
+            except Exception as e:
+                print(f"Article ingest error: {e}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name='article-ingester', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,173 @@
+import os
+import json
+import threading
+from datetime import datetime
+from pdf_generator import generate_pdf, log_pdf_size
+from audio_generator import stream_audio
+
+# 0 renders the PDF and MP3 while generating the newsletter, as before
+LAZY_ARTIFACTS = os.environ.get('LAZY_ARTIFACTS', '1') != '0'
+
+_render_locks = {}
+_render_locks_lock = threading.Lock()
+
+_audio_renders = {}
+_audio_renders_lock = threading.Lock()
+
+def edition_content(articles, overall_summary, primary_color, secondary_color, font_style, edition_date=None):
+    """Serialize what's needed to render a newsletter's PDF and audio later."""
+    return json.dumps({
+        'edition_date': (edition_date or datetime.now()).isoformat(),
+        'articles': articles,
+        'overall_summary': overall_summary,
+        'primary_color': primary_color,
+        'secondary_color': secondary_color,
+        'font_style': font_style
+    }, ensure_ascii=False)
+
+def render_lock(path):
+    with _render_locks_lock:
+        if path not in _render_locks:
+            _render_locks[path] = threading.Lock()
+        return _render_locks[path]
+
+def rendered_path(newsletter, kind):
+    """Return the newsletter's PDF or MP3 path if that file has already been rendered, else None."""
+    path = newsletter.pdf_path if kind == 'pdf' else newsletter.audio_path
+    if path and os.path.exists(path):
+        return path
+    return None
+
+def render_artifact(newsletter, kind):
+    """Make sure the newsletter's PDF or MP3 (``kind`` 'pdf' or 'audio') exists and return its path.
+
+    The file is rendered from the stored edition content on first use.
+    Concurrent callers for the same file share one render, so it is only
+    rendered once; it's written to a temporary name and moved into place,
+    so a partly written file is never served.
+    """
+    path = newsletter.pdf_path if kind == 'pdf' else newsletter.audio_path
+    if not path or os.path.exists(path):
+        return path
+    if not newsletter.content:
+        raise FileNotFoundError(f"{path} is missing and there is no stored content to render it from")
+    if kind == 'audio':
+        return audio_render(newsletter).wait()
+
+    with render_lock(path):
+        if os.path.exists(path):
+            return path
+
+        content = json.loads(newsletter.content)
+        base, ext = os.path.splitext(path)
+        tmp_path = f'{base}.part{ext}'
+        generate_pdf(
+            content['articles'],
+            tmp_path,
+            primary_color=content['primary_color'],
+            secondary_color=content['secondary_color'],
+            font_style=content['font_style'],
+            overall_summary=content['overall_summary'],
+            edition_date=datetime.fromisoformat(content['edition_date'])
+        )
+        os.replace(tmp_path, path)
+        log_pdf_size(path)
+
+    with _render_locks_lock:
+        _render_locks.pop(path, None)
+    return path
+
+class AudioRender:
+    """One background synthesis of a newsletter's MP3, shared by every stream and download of it."""
+
+    def __init__(self, path, content):
+        self.path = path
+        self.content = content
+        self.parts = []
+        self.done = False
+        self.error = None
+        self.cond = threading.Condition()
+        threading.Thread(target=self.run, name='audio-render', daemon=True).start()
+
+    def run(self):
+        content = json.loads(self.content)
+        try:
+            if os.path.exists(self.path):
+                # Finished by a render that ended after the caller checked
+                with open(self.path, 'rb') as f:
+                    self.parts.append(f.read())
+                return
+
+            for data in stream_audio(
+                content['articles'],
+                content['overall_summary'],
+                datetime.fromisoformat(content['edition_date'])
+            ):
+                with self.cond:
+                    self.parts.append(data)
+                    self.cond.notify_all()
+
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            base, ext = os.path.splitext(self.path)
+            tmp_path = f'{base}.part{ext}'
+            with open(tmp_path, 'wb') as f:
+                f.write(b''.join(self.parts))
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error generating audio: {e}")
+            self.error = e
+        finally:
+            # Unregister before waking readers: later requests find the file (or start over after an error)
+            with _audio_renders_lock:
+                _audio_renders.pop(self.path, None)
+            with self.cond:
+                self.done = True
+                self.cond.notify_all()
+
+    def chunks(self):
+        """Yield the MP3 from the start, waiting for chunks still being synthesized."""
+        sent = 0
+        while True:
+            with self.cond:
+                while sent == len(self.parts) and not self.done:
+                    self.cond.wait()
+                new = self.parts[sent:]
+                sent = len(self.parts)
+                if not new:
+                    if self.error:
+                        raise self.error
+                    return
+            yield from new
+
+    def wait(self):
+        """Block until the file is written and return its path."""
+        with self.cond:
+            while not self.done:
+                self.cond.wait()
+        if self.error:
+            raise self.error
+        return self.path
+
+def audio_render(newsletter):
+    """The running AudioRender for a newsletter's MP3, started if there isn't one."""
+    path = newsletter.audio_path
+    with _audio_renders_lock:
+        render = _audio_renders.get(path)
+        if render is None:
+            render = _audio_renders[path] = AudioRender(path, newsletter.content)
+        return render
+
+def stream_audio_artifact(newsletter):
+    """Yield a newsletter's MP3 while it's being synthesized.
+
+    Audio is sent segment by segment as soon as each is ready, from the
+    edition's shared AudioRender; once it finishes the MP3 is saved as
+    the newsletter's audio file.
+    """
+    return audio_render(newsletter).chunks()
+
+def prepare_artifacts(newsletter):
+    """Render both files now unless rendering is deferred to first download."""
+    if not LAZY_ARTIFACTS:
+        render_artifact(newsletter, 'pdf')
+        render_artifact(newsletter, 'audio')
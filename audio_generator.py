@@ -1,65 +1,267 @@
 import os
+import re
+import hashlib
+import json
+import shutil
+import subprocess
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 from gtts import gTTS
 from datetime import datetime
+from cache import CACHE_DIR, DiskCacheBudget
+from mp3 import audio_frames, concat
 
-def generate_audio(articles, output_path, overall_summary=''):
-    """Generate audio version of the newsletter using gTTS."""
+AUDIO_CACHE_DIR = os.environ.get('AUDIO_CACHE_DIR', os.path.join(CACHE_DIR, 'tts'))
+AUDIO_CACHE_MAX_BYTES = int(os.environ.get('AUDIO_CACHE_MAX_BYTES', 500 * 1024 * 1024))
+TTS_LANG = 'en'
+TTS_BACKEND = os.environ.get('TTS_BACKEND', 'gtts').strip().lower()
+TTS_WORKERS = int(os.environ.get('TTS_WORKERS', 4))
+# 0 uses the backend's own limit
+TTS_CHUNK_CHARS = int(os.environ.get('TTS_CHUNK_CHARS', 0))
+ESPEAK_VOICE = os.environ.get('ESPEAK_VOICE', 'en-us')
+ESPEAK_SPEED = int(os.environ.get('ESPEAK_SPEED', 165))
+
+SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+
+audio_cache_budget = DiskCacheBudget(AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_BYTES, suffix='.mp3')
+
+class TTSBackend(ABC):
+    """A text-to-speech engine.
+
+    ``synthesize`` turns text into MP3 bytes; ``max_chars`` is the longest
+    text worth sending in one call. Engines are looked up by ``name`` in
+    TTS_BACKENDS.
+    """
+    name = ''
+    max_chars = 100
+    
+    @abstractmethod
+    def synthesize(self, text):
+        pass
+
+class GTTSBackend(TTSBackend):
+    """Google Translate speech through gTTS; needs network access."""
+    name = 'gtts'
+    # gTTS sends at most 100 characters per request
+    max_chars = 100
+    
+    def synthesize(self, text):
+        buffer = BytesIO()
+        gTTS(text=text, lang=TTS_LANG, slow=False).write_to_fp(buffer)
+        return buffer.getvalue()
+
+class EspeakBackend(TTSBackend):
+    """Offline speech from espeak-ng, encoded to MP3 with ffmpeg."""
+    name = 'espeak'
+    max_chars = 1000
+    
+    def synthesize(self, text):
+        espeak = shutil.which('espeak-ng') or shutil.which('espeak')
+        ffmpeg = shutil.which('ffmpeg')
+        if not espeak or not ffmpeg:
+            raise RuntimeError("The espeak TTS backend needs espeak-ng and ffmpeg installed")
+        
+        wav = subprocess.run(
+            [espeak, '--stdin', '--stdout', '-v', ESPEAK_VOICE, '-s', str(ESPEAK_SPEED)],
+            input=text.encode('utf-8'), capture_output=True, check=True, timeout=120
+        ).stdout
+        return subprocess.run(
+            [ffmpeg, '-loglevel', 'error', '-f', 'wav', '-i', 'pipe:0',
+             '-f', 'mp3', '-b:a', '64k', '-id3v2_version', '0', '-write_xing', '0', 'pipe:1'],
+            input=wav, capture_output=True, check=True, timeout=120
+        ).stdout
+
+TTS_BACKENDS = {backend.name: backend for backend in (GTTSBackend(), EspeakBackend())}
+
+def get_tts_backend(name=None):
+    """Return the TTS backend called ``name`` (default TTS_BACKEND)."""
+    name = (name or TTS_BACKEND).lower()
+    if name not in TTS_BACKENDS:
+        print(f"Unknown TTS backend '{name}', using gtts")
+        name = 'gtts'
+    return TTS_BACKENDS[name]
+
+def generate_audio(articles, output_path, overall_summary='', edition_date=None, workers=None, backend=None):
+    """Generate audio version of the newsletter as an MP3 at ``output_path``.
+
+    Speech comes from the ``backend`` TTS engine (default TTS_BACKEND).
+    The script is synthesized segment by segment and each segment's MP3 is
+    cached by its text, so a story carried by many editions is only
+    synthesized once. Segments that aren't cached are cut into
+    sentence chunks that are synthesized on up to ``workers`` threads
+    (default TTS_WORKERS). Everything is joined in script order by
+    concatenating the MP3 frames.
+    """
     
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
-    script = create_audio_script(articles, overall_summary)
+    segments = [normalize_segment(text) for text in create_audio_segments(articles, overall_summary, edition_date)]
     
     try:
-        tts = gTTS(text=script, lang='en', slow=False)
-        tts.save(output_path)
+        parts = synthesize_segments([text for text in segments if text], workers, get_tts_backend(backend))
+        with open(output_path, 'wb') as f:
+            f.write(concat(parts))
         return output_path
     except Exception as e:
         print(f"Error generating audio: {e}")
         raise
 
-def create_audio_script(articles, overall_summary=''):
-    """Create a readable script for text-to-speech."""
+def normalize_segment(text):
+    return re.sub(r'\s+', ' ', text).strip()
+
+def split_for_tts(text, max_chars=100):
+    """Cut text into chunks of whole sentences of up to ``max_chars`` characters.
+
+    A sentence longer than the limit is kept whole; the TTS engine splits it.
+    """
+    chunks = []
+    current = ''
+    for sentence in SENTENCE_END_RE.split(text):
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f'{current} {sentence}' if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+def segment_cache_path(text, backend):
+    payload = json.dumps([backend.name, TTS_LANG, text], ensure_ascii=False)
+    digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    return os.path.join(AUDIO_CACHE_DIR, digest[:2], f'{digest}.mp3')
+
+def read_cached_segment(text, backend):
+    path = segment_cache_path(text, backend)
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        os.utime(path)
+        return data
+    except OSError:
+        return None
+
+def store_cached_segment(text, data, backend):
+    path = segment_cache_path(text, backend)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    audio_cache_budget.add(len(data))
+
+def iter_segment_audio(texts, workers=None, backend=None):
+    """Yield MP3 bytes for each script segment, in order, as soon as it's ready.
+
+    Cached segments are read from disk. The rest are split into sentence
+    chunks and all chunks are submitted, in script order, to one pool of
+    ``workers`` threads (default TTS_WORKERS). Each segment is
+    reassembled from its chunks and cached as soon as its own chunks are
+    done, so the first segments can be played while later ones are still
+    being synthesized.
+    """
+    workers = TTS_WORKERS if workers is None else workers
+    backend = backend or get_tts_backend()
+    max_chars = TTS_CHUNK_CHARS or backend.max_chars
+    results = [read_cached_segment(text, backend) for text in texts]
+    missing = list(dict.fromkeys(text for text, data in zip(texts, results) if data is None))
+    if not missing:
+        yield from results
+        return
+    
+    chunk_count = sum(len(split_for_tts(text, max_chars)) for text in missing)
+    executor = ThreadPoolExecutor(max_workers=max(min(workers, chunk_count), 1))
+    try:
+        futures = {
+            text: [executor.submit(backend.synthesize, chunk) for chunk in split_for_tts(text, max_chars)]
+            for text in missing
+        }
+        synthesized = {}
+        for text, data in zip(texts, results):
+            if data is None:
+                if text not in synthesized:
+                    synthesized[text] = concat(future.result() for future in futures[text])
+                    store_cached_segment(text, synthesized[text], backend)
+                data = synthesized[text]
+            yield data
+    finally:
+        # Stop outstanding work if the consumer gives up (e.g. a client disconnects)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def synthesize_segments(texts, workers=None, backend=None):
+    """MP3 bytes for each script segment, in order."""
+    return list(iter_segment_audio(texts, workers, backend))
+
+def stream_audio(articles, overall_summary='', edition_date=None, workers=None, backend=None):
+    """Yield the newsletter MP3 progressively, one segment's audio frames at a time.
+
+    Concatenating everything yielded gives the same file generate_audio writes.
+    """
+    segments = [normalize_segment(text) for text in create_audio_segments(articles, overall_summary, edition_date)]
+    for data in iter_segment_audio([text for text in segments if text], workers, get_tts_backend(backend)):
+        yield audio_frames(data)
+
+def create_audio_segments(articles, overall_summary='', edition_date=None):
+    """Split the text-to-speech script into independently synthesized segments.
+
+    Segments are the intro, overview, each story's number, each story's
+    body, the transitions between stories and the outro. A story body
+    doesn't depend on its position, so it's the same in every edition
+    carrying the story. Joined with spaces the segments give the script.
+    """
     
-    lines = []
+    edition_date = edition_date or datetime.now()
+    segments = []
     
-    lines.append("Welcome to your daily newsletter.")
-    lines.append(f"Today is {datetime.now().strftime('%B %d, %Y')}.")
-    lines.append(f"We have {len(articles)} stories for you today.")
+    segments.append([
+        "Welcome to your daily newsletter.",
+        f"Today is {edition_date.strftime('%B %d, %Y')}.",
+        f"We have {len(articles)} stories for you today."
+    ])
     
     if overall_summary:
-        lines.append("")
-        lines.append("Here's a quick overview of today's top stories.")
-        lines.append(clean_text_for_speech(overall_summary))
+        segments.append([
+            "",
+            "Here's a quick overview of today's top stories.",
+            clean_text_for_speech(overall_summary)
+        ])
     
-    lines.append("")
-    lines.append("Now, let's dive into the details.")
-    lines.append("")
+    segments.append(["", "Now, let's dive into the details.", ""])
     
     for i, article in enumerate(articles, 1):
-        lines.append(f"Story number {i}.")
+        segments.append([f"Story number {i}."])
         
         title = article.get('title', 'Untitled')
         title = clean_text_for_speech(title)
-        lines.append(title)
+        story = [title]
         
-        lines.append(f"From {article.get('source', 'unknown source')}.")
+        story.append(f"From {article.get('source', 'unknown source')}.")
         
         summary = article.get('simplified_summary', article.get('original_summary', ''))
         summary = clean_text_for_speech(summary)
-        lines.append(summary)
+        story.append(summary)
         
         if article.get('link'):
-            lines.append("You can find the full article link in your PDF newsletter.")
+            story.append("You can find the full article link in your PDF newsletter.")
+        segments.append(story)
         
         if i < len(articles):
-            lines.append("Moving on to the next story.")
-        
-        lines.append("")
+            segments.append(["Moving on to the next story.", ""])
+        else:
+            segments.append([""])
     
-    lines.append("That concludes today's newsletter.")
-    lines.append("Thank you for listening. Have a great day!")
+    segments.append([
+        "That concludes today's newsletter.",
+        "Thank you for listening. Have a great day!"
+    ])
     
-    return " ".join(lines)
+    return [" ".join(lines) for lines in segments]
+
+def create_audio_script(articles, overall_summary='', edition_date=None):
+    """Create a readable script for text-to-speech."""
+    return " ".join(create_audio_segments(articles, overall_summary, edition_date))
 
 def clean_text_for_speech(text):
     """Clean text to make it more suitable for speech synthesis."""
@@ -88,7 +290,6 @@ def clean_text_for_speech(text):
     for old, new in replacements.items():
         text = text.replace(old, new)
     
-    import re
     text = re.sub(r'\s+', ' ', text)
     text = text.strip()
     
@@ -0,0 +1,87 @@
+"""Check MP3 joining and the per-segment TTS cache without network access.
+
+Speech comes from a counting fake TTS backend that returns a tagged
+MP3 (ID3v2 tag, Info header frame, three audio frames, ID3v1 tag) per
+TTS chunk, so the joined file can be walked frame by frame. Two editions
+sharing 8 of their 10 stories are then generated, and the second should
+only synthesize the chunks of its new segments. Run from the project root:
+
+    python -m benchmarks.bench_audio_segments
+"""
+import os
+import tempfile
+from datetime import datetime
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, stereo
+FRAME_HEADER = bytes([0xFF, 0xFB, 0x90, 0x64])
+
+def fake_mp3(text):
+    """A tagged MP3 whose three audio frames are filled with the text's first byte."""
+    from mp3 import frame_length
+
+    length = frame_length(FRAME_HEADER)
+    fill = text[:1].encode('utf-8') or b'z'
+    info = FRAME_HEADER + b'\0' * 32 + b'Info' + b'\0' * (length - 40)
+    frame = FRAME_HEADER + (fill * length)[:length - 4]
+    id3v2 = b'ID3\x04\x00\x00\x00\x00\x00\x05abcde'
+    id3v1 = b'TAG' + b'\0' * 125
+    return id3v2 + info + frame * 3 + id3v1
+
+def count_frames(data):
+    """Number of back-to-back MPEG frames in ``data``; raises if anything else is found."""
+    from mp3 import frame_length
+
+    offset = frames = 0
+    while offset < len(data):
+        length = frame_length(data[offset:offset + 4])
+        if not length:
+            raise ValueError(f"No MPEG frame at byte {offset}")
+        offset += length
+        frames += 1
+    return frames
+
+def story(i):
+    return {
+        'title': f'Story {i}',
+        'source': 'BBC News',
+        'simplified_summary': f'Summary of story {i}.',
+        'link': f'https://example.com/news/{i}'
+    }
+
+def main():
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.environ.setdefault('CACHE_DIR', os.path.join(work_dir, 'cache'))
+        import audio_generator
+
+        calls = []
+        class CountingBackend(audio_generator.TTSBackend):
+            name = 'fake'
+
+            def synthesize(self, text):
+                calls.append(text)
+                return fake_mp3(text)
+        backend = CountingBackend()
+        audio_generator.TTS_BACKENDS[backend.name] = backend
+
+        edition_date = datetime(2025, 3, 4)
+        first = [story(i) for i in range(10)]
+        second = first[2:] + [story(10), story(11)]
+
+        path = os.path.join(work_dir, 'first.mp3')
+        audio_generator.generate_audio(first, path, 'Overview one.', edition_date, backend=backend.name)
+        script = [audio_generator.normalize_segment(text)
+                  for text in audio_generator.create_audio_segments(first, 'Overview one.', edition_date)]
+        chunks = sum(len(audio_generator.split_for_tts(text, backend.max_chars)) for text in script if text)
+        frames = count_frames(open(path, 'rb').read())
+        print(f"first edition: {len(set(filter(None, script)))} distinct segments, {len(calls)} chunks synthesized")
+        print(f"joined file: {frames} frames, expected {chunks * 3} with every tag and Info frame dropped")
+
+        calls.clear()
+        audio_generator.generate_audio(second, os.path.join(work_dir, 'second.mp3'), 'Overview two.', edition_date,
+                                       backend=backend.name)
+        print(f"second edition (8 of 10 stories shared): {len(calls)} chunks synthesized")
+        for text in calls:
+            print(f"  {text[:60]}")
+
+if __name__ == '__main__':
+    main()
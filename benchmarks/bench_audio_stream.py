@@ -0,0 +1,95 @@
+"""Check that overlapping audio streams and downloads share one synthesis.
+
+A newsletter row is stored with its edition content and no MP3. Three
+/stream/audio requests and one /download/audio request then run at the
+same time through the Flask test client, with speech from a counting
+fake TTS backend. They should make exactly the synthesize calls of one
+render (the chunks of each distinct segment), and all four responses
+should match the saved file. The finished file is then requested with
+a Range header and with If-None-Match.
+
+The row is added to the app's development database and removed again.
+Run from the project root:
+
+    python -m benchmarks.bench_audio_stream
+"""
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from benchmarks.bench_audio_segments import fake_mp3, story
+
+STREAMS = 3
+CHUNK_DELAY = 0.02
+
+def main():
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.environ.setdefault('CACHE_DIR', os.path.join(work_dir, 'cache'))
+        import audio_generator
+        from app import app
+        from artifacts import edition_content
+        from database import db, Newsletter
+
+        calls = []
+        class CountingBackend(audio_generator.TTSBackend):
+            name = 'fake'
+
+            def synthesize(self, text):
+                calls.append(text)
+                time.sleep(CHUNK_DELAY)
+                return fake_mp3(text)
+        backend = CountingBackend()
+        audio_generator.TTS_BACKENDS[backend.name] = backend
+        audio_generator.TTS_BACKEND = backend.name
+
+        articles = [story(i) for i in range(6)]
+        edition_date = datetime(2025, 3, 4)
+        audio_path = os.path.join(work_dir, 'edition.mp3')
+        with app.app_context():
+            newsletter = Newsletter(
+                title='Audio stream check',
+                topics='technology',
+                overall_summary='Overview.',
+                audio_path=audio_path,
+                content=edition_content(articles, 'Overview.', '#1a73e8', '#4285f4', 'modern', edition_date)
+            )
+            db.session.add(newsletter)
+            db.session.commit()
+            newsletter_id = newsletter.id
+
+        try:
+            urls = [f'/stream/audio/{newsletter_id}'] * STREAMS + [f'/download/audio/{newsletter_id}']
+            bodies = [None] * len(urls)
+            def fetch(i):
+                bodies[i] = app.test_client().get(urls[i]).data
+            threads = [threading.Thread(target=fetch, args=(i,)) for i in range(len(urls))]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            segments = [audio_generator.normalize_segment(text)
+                        for text in audio_generator.create_audio_segments(articles, 'Overview.', edition_date)]
+            one_render = sum(len(audio_generator.split_for_tts(text, backend.max_chars))
+                             for text in set(filter(None, segments)))
+            with open(audio_path, 'rb') as f:
+                saved = f.read()
+            print(f"{STREAMS} streams + 1 download: {len(calls)} synthesize calls, {one_render} for one render")
+            print(f"all responses identical to the saved MP3: {all(body == saved for body in bodies)}")
+
+            client = app.test_client()
+            ranged = client.get(f'/download/audio/{newsletter_id}', headers={'Range': 'bytes=100-199'})
+            print(f"Range bytes=100-199: {ranged.status_code}, {len(ranged.data)} bytes, "
+                  f"matches file: {ranged.data == saved[100:200]}")
+            etag = ranged.headers['ETag']
+            cached = client.get(f'/stream/audio/{newsletter_id}', headers={'If-None-Match': etag})
+            print(f"If-None-Match on the finished stream: {cached.status_code}")
+        finally:
+            with app.app_context():
+                db.session.delete(db.session.get(Newsletter, newsletter_id))
+                db.session.commit()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""Show which cross-outlet duplicates each DUPLICATE_THRESHOLD catches.
+
+fixtures/duplicate_pairs.json holds BBC/NYT-style write-ups of the same
+story ("same_story", which should merge) and different stories on the
+same subject ("different_story", which must not). Each pair is run
+through cluster_articles, so the MinHash/LSH candidate step is included.
+Run from the project root:
+
+    python -m benchmarks.bench_dedupe
+"""
+import json
+import os
+
+from dedupe import DUPLICATE_THRESHOLD, article_shingles, cluster_articles, jaccard
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'duplicate_pairs.json')
+THRESHOLDS = (0.25, 0.3, 0.35, 0.4, 0.45, 0.5)
+
+def merged(pair, threshold):
+    return len(cluster_articles(pair, threshold)) == 1
+
+def main():
+    with open(FIXTURE, encoding='utf-8') as f:
+        pairs = json.load(f)
+    same, different = pairs['same_story'], pairs['different_story']
+
+    print(f"{'pair':<52} {'jaccard':>8}")
+    for label, group in (('same', same), ('different', different)):
+        for a, b in group:
+            score = jaccard(article_shingles(a), article_shingles(b))
+            print(f"{label + ': ' + a['title'][:38]:<52} {score:>8.2f}")
+
+    print(f"\n{'threshold':>10} {'caught':>10} {'false merges':>14}")
+    for threshold in THRESHOLDS:
+        caught = sum(merged(pair, threshold) for pair in same)
+        false = sum(merged(pair, threshold) for pair in different)
+        marker = '  (default)' if threshold == DUPLICATE_THRESHOLD else ''
+        print(f"{threshold:>10.2f} {caught:>5}/{len(same):<4} {false:>8}/{len(different):<5}{marker}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Compare the two-pass BeautifulSoup summary cleanup with the single-pass parser.
+
+Uses the recorded feeds in benchmarks/fixtures. Run from the project root:
+
+    python -m benchmarks.bench_html_cleanup
+"""
+import os
+import re
+import time
+
+import feedparser
+from bs4 import BeautifulSoup
+
+from news_fetcher import clean_summary_html
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+ROUNDS = 20
+
+def legacy_cleanup(summary_html):
+    """The previous implementation: one soup for the image, one for the text."""
+    image_url = ''
+    if summary_html:
+        img = BeautifulSoup(summary_html, 'html.parser').find('img')
+        if img and img.get('src'):
+            image_url = img['src']
+    text = BeautifulSoup(summary_html, 'html.parser').get_text()
+    return re.sub(r'\s+', ' ', text).strip(), image_url
+
+def load_summaries(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        feed = feedparser.parse(f.read())
+    return [entry.get('summary', entry.get('description', '')) for entry in feed.entries]
+
+def time_it(fn, summaries):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for summary in summaries:
+            fn(summary)
+    return time.perf_counter() - start
+
+def main():
+    print(f"{'fixture':<22} {'entries':>8} {'bs4 x2 (ms)':>12} {'single (ms)':>12} {'speedup':>8}")
+    for name in sorted(os.listdir(FIXTURES)):
+        if not name.endswith('.xml'):
+            continue
+        summaries = load_summaries(name)
+        mismatches = sum(1 for s in summaries if legacy_cleanup(s) != clean_summary_html(s))
+
+        old = time_it(legacy_cleanup, summaries)
+        new = time_it(clean_summary_html, summaries)
+        entries = len(summaries) * ROUNDS
+        print(f"{name:<22} {entries:>8} {old * 1000:>12.1f} {new * 1000:>12.1f} {old / new:>7.1f}x")
+        if mismatches:
+            print(f"  {mismatches} summaries cleaned differently")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Time bulk PDF generation with and without the style and flowable caches.
+
+Renders PDFS newsletters for subscribers spread over a few themes, each
+getting 10 articles picked from a shared pool of 30, the way one
+/generate run does. Images are left out so only layout work is timed.
+Run from the project root:
+
+    python -m benchmarks.bench_pdf_cache
+"""
+import os
+import random
+import tempfile
+import time
+
+import pdf_generator
+from pdf_generator import generate_pdf, clear_render_caches
+
+PDFS = 500
+THEMES = [
+    ('#1a73e8', '#4285f4', 'modern'),
+    ('#1a73e8', '#4285f4', 'classic'),
+    ('#c0392b', '#7f8c8d', 'clean'),
+    ('#2c3e50', '#16a085', 'elegant'),
+]
+
+def make_articles():
+    sentence = "Officials said the plan would take effect next year after a review of costs & benefits. "
+    return [{
+        'title': f'Story {i}: the <latest> on topic {i % 7}',
+        'source': random.choice(['BBC News', 'The New York Times']),
+        'published': 'Mon, 13 Oct 2025 09:00:00 GMT',
+        'also_reported_by': ['BBC News'] if i % 4 == 0 else [],
+        'simplified_summary': sentence * random.randint(2, 6),
+        'link': f'https://example.com/news/{i}?ref=rss&id={i}'
+    } for i in range(30)]
+
+def make_jobs(pool):
+    return [(random.sample(pool, 10), random.choice(THEMES)) for _ in range(PDFS)]
+
+def run(jobs, out_dir, cached):
+    clear_render_caches()
+    start = time.perf_counter()
+    for i, (articles, theme) in enumerate(jobs):
+        if not cached:
+            clear_render_caches()
+        generate_pdf(articles, os.path.join(out_dir, f'{i}.pdf'), *theme,
+                     overall_summary='Today covers policy, markets and science.')
+    return time.perf_counter() - start
+
+def main():
+    random.seed(7)
+    jobs = make_jobs(make_articles())
+    with tempfile.TemporaryDirectory() as out_dir:
+        uncached = run(jobs, out_dir, cached=False)
+        cached = run(jobs, out_dir, cached=True)
+        entries = len(pdf_generator._flowable_cache)
+
+    print(f"{PDFS} PDFs, {len(THEMES)} themes, 30 shared articles")
+    print(f"{'no cache':<12} {uncached:>8.2f}s {uncached / PDFS * 1000:>8.1f} ms/pdf")
+    print(f"{'cached':<12} {cached:>8.2f}s {cached / PDFS * 1000:>8.1f} ms/pdf")
+    print(f"speedup {uncached / cached:.2f}x, {entries} cached articles")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Report PDF byte sizes for each output profile.
+
+Serves generated photo-sized JPEGs from a local HTTP server so the image
+path is exercised end to end, then renders the same 10-article edition
+with every profile in pdf_generator.PDF_PROFILES. Run from the project root:
+
+    python -m benchmarks.bench_pdf_size
+"""
+import os
+import tempfile
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from PIL import Image, ImageDraw
+
+IMAGES = 10
+PORT = 8797
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+def make_photo(path, seed):
+    """A 1600x1000 JPEG with gradients and noise, roughly as hard to compress as a photo."""
+    img = Image.linear_gradient('L').resize((1600, 1000)).convert('RGB')
+    draw = ImageDraw.Draw(img)
+    for i in range(40):
+        x = (seed * 97 + i * 151) % 1600
+        y = (seed * 53 + i * 89) % 1000
+        draw.ellipse([x, y, x + 180, y + 120], fill=((i * 40) % 255, (seed * 70) % 255, (i * 15) % 255))
+    noise = Image.effect_noise((1600, 1000), 25).convert('RGB')
+    Image.blend(img, noise, 0.2).save(path, 'JPEG', quality=92)
+
+def main():
+    with tempfile.TemporaryDirectory() as work_dir:
+        image_dir = os.path.join(work_dir, 'images')
+        os.makedirs(image_dir)
+        for i in range(IMAGES):
+            make_photo(os.path.join(image_dir, f'{i}.jpg'), i)
+
+        server = ThreadingHTTPServer(('localhost', PORT), partial(QuietHandler, directory=image_dir))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        os.environ.setdefault('CACHE_DIR', os.path.join(work_dir, 'cache'))
+        from pdf_generator import PDF_PROFILES, generate_pdf
+
+        articles = [{
+            'title': f'Story {i}',
+            'source': 'BBC News',
+            'published': 'Mon, 13 Oct 2025 09:00:00 GMT',
+            'simplified_summary': 'Officials said the plan would take effect next year. ' * 4,
+            'link': f'https://example.com/news/{i}',
+            'image_url': f'http://localhost:{PORT}/{i}.jpg'
+        } for i in range(IMAGES)]
+
+        source_bytes = sum(os.path.getsize(os.path.join(image_dir, name)) for name in os.listdir(image_dir))
+        print(f"{IMAGES} source images, {source_bytes / 1024:.0f} KB in total")
+        print(f"{'profile':<10} {'size (KB)':>10}")
+        for profile in PDF_PROFILES:
+            path = os.path.join(work_dir, f'{profile}.pdf')
+            generate_pdf(articles, path, overall_summary='Today covers policy and science.', profile=profile)
+            print(f"{profile:<10} {os.path.getsize(path) / 1024:>10.1f}")
+
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
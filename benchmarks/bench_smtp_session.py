@@ -0,0 +1,82 @@
+"""Check SMTPSession connection reuse against a stubbed smtplib.SMTP.
+
+The stub counts handshakes and can drop the connection or refuse a
+recipient, so no mail server is needed. It checks that 10 sends with a
+cap of 4 messages per connection make 3 handshakes (10 without a session),
+that a dropped connection is re-opened and the message retried, and that
+a refused recipient is raised without a retry. Run from the project root:
+
+    python -m benchmarks.bench_smtp_session
+"""
+import os
+import smtplib
+
+os.environ.setdefault('SMTP_EMAIL', 'newsletter@example.com')
+os.environ.setdefault('SMTP_PASSWORD', 'password')
+
+import email_sender
+
+REFUSED = 'refused@example.com'
+
+class StubSMTP:
+    """Stands in for smtplib.SMTP and logs every call."""
+    log = []
+    drop_next = False
+
+    def __init__(self, host, port, timeout=None):
+        self.log.append('connect')
+
+    def starttls(self):
+        self.log.append('starttls')
+
+    def login(self, user, password):
+        self.log.append('login')
+
+    def sendmail(self, from_addr, to_addr, msg):
+        if to_addr == REFUSED:
+            self.log.append('refused')
+            raise smtplib.SMTPRecipientsRefused({to_addr: (550, b'No such user')})
+        if StubSMTP.drop_next:
+            StubSMTP.drop_next = False
+            self.log.append('dropped')
+            raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+        self.log.append(f'send {to_addr}')
+
+    def quit(self):
+        self.log.append('quit')
+
+    def close(self):
+        self.log.append('close')
+
+def send(to_email, session=None):
+    email_sender.send_newsletter_email(to_email, 'Newsletter', '<p>Hello</p>', session=session)
+
+def main():
+    email_sender.smtplib.SMTP = StubSMTP
+    recipients = [f'user{i}@example.com' for i in range(10)]
+
+    for recipient in recipients:
+        send(recipient)
+    print(f"10 sends without a session: {StubSMTP.log.count('connect')} handshakes")
+    StubSMTP.log.clear()
+
+    with email_sender.SMTPSession(max_messages=4) as session:
+        for recipient in recipients:
+            send(recipient, session)
+    print(f"10 sends in one session, cap 4: {StubSMTP.log.count('connect')} handshakes, "
+          f"{sum(entry.startswith('send') for entry in StubSMTP.log)} delivered")
+    StubSMTP.log.clear()
+
+    with email_sender.SMTPSession() as session:
+        send('first@example.com', session)
+        StubSMTP.drop_next = True
+        send('second@example.com', session)
+        try:
+            send(REFUSED, session)
+        except smtplib.SMTPRecipientsRefused:
+            print("refused recipient raised without a retry:", StubSMTP.log.count('refused') == 1)
+        send('third@example.com', session)
+    print("dropped connection:", ' -> '.join(StubSMTP.log))
+
+if __name__ == '__main__':
+    main()
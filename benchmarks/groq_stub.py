@@ -0,0 +1,128 @@
+"""Local stand-in for the Groq chat completions API.
+
+Answers every chat completion with a short canned summary after a fixed
+delay, and enforces a requests-per-minute quota by replying 429 with a
+Retry-After header, like the real free tier. With --fail-every N every
+Nth request gets a 503 instead. Point the app at it to exercise the
+summarizer, its rate limiter and its retries offline:
+
+    python -m benchmarks.groq_stub --port 8790 --rpm 30
+    GROQ_API_KEY=stub GROQ_BASE_URL=http://localhost:8790 python app.py
+"""
+import argparse
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubState:
+    def __init__(self, rpm, latency, fail_every=0):
+        self.rpm = rpm
+        self.latency = latency
+        self.fail_every = fail_every
+        self.calls = deque()
+        self.served = 0
+        self.rejected = 0
+        self.failed = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def admit(self):
+        """Return 0 if the call fits the quota, else seconds until it would."""
+        with self.lock:
+            now = time.time()
+            while self.calls and now - self.calls[0] >= 60:
+                self.calls.popleft()
+            if len(self.calls) >= self.rpm:
+                self.rejected += 1
+                return 60 - (now - self.calls[0])
+            self.calls.append(now)
+            self.served += 1
+            return 0
+
+    def should_fail(self):
+        """True if this request should get a 503 (every ``fail_every``th one)."""
+        with self.lock:
+            self.requests += 1
+            if self.fail_every and self.requests % self.fail_every == 0:
+                self.failed += 1
+                return True
+            return False
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def send_json(self, status, body, headers=None):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+
+            if state.should_fail():
+                self.send_json(503, {'error': {'message': 'Service unavailable', 'type': 'server_error'}})
+                return
+
+            wait = state.admit()
+            if wait:
+                self.send_json(429, {'error': {'message': 'Rate limit reached', 'type': 'requests'}},
+                               {'retry-after': f'{wait:.2f}'})
+                return
+
+            time.sleep(state.latency)
+            if request.get('response_format', {}).get('type') == 'json_object':
+                count = request['messages'][-1]['content'].count('\nArticle ')
+                content = json.dumps({'summaries': [
+                    {'id': i, 'summary': f'Stub summary {i}.'} for i in range(1, count + 1)
+                ]})
+            else:
+                content = 'Stub summary.'
+
+            self.send_json(200, {
+                'id': 'stub',
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': request.get('model', 'stub'),
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': content}}],
+                'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+            })
+
+    return Handler
+
+def serve(port=8790, rpm=30, latency=0.2, fail_every=0):
+    """Start the stub in a background thread. Returns ``(server, state)``."""
+    state = StubState(rpm, latency, fail_every)
+    server = ThreadingHTTPServer(('localhost', port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8790)
+    parser.add_argument('--rpm', type=int, default=30)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--fail-every', type=int, default=0)
+    args = parser.parse_args()
+
+    server, state = serve(args.port, args.rpm, args.latency, args.fail_every)
+    print(f"Groq stub listening on http://localhost:{args.port} ({args.rpm} requests/minute)")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"served={state.served} rejected={state.rejected} failed={state.failed}")
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+import os
+import json
+import sqlite3
+import threading
+import time
+
+CACHE_DIR = os.environ.get('CACHE_DIR', 'cache')
+
+class SQLiteCache:
+    """Small persistent key/value cache stored in a SQLite file.
+
+    Values are JSON encoded. Every ``evict_every`` writes, entries older
+    than ``max_age`` seconds are evicted, and when ``max_entries`` is set
+    the least recently stored entries beyond that count are dropped as well.
+    """
+
+    def __init__(self, name, max_age=None, max_entries=None, cache_dir=None, evict_every=100):
+        self.path = os.path.join(cache_dir or CACHE_DIR, f'{name}.db')
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self._lock = threading.Lock()
+        self._ready = False
+        self._writes = 0
+
+    def _connect(self):
+        if not self._ready:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._ready:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_entries_stored_at ON entries (stored_at)')
+            conn.commit()
+            self._ready = True
+        return conn
+
+    def get(self, key):
+        """Return ``(value, stored_at)`` for a key, or ``None`` on a miss."""
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    row = conn.execute(
+                        'SELECT value, stored_at FROM entries WHERE key = ?', (key,)
+                    ).fetchone()
+                finally:
+                    conn.close()
+        except sqlite3.Error as e:
+            print(f"Cache read error ({self.path}): {e}")
+            return None
+
+        if not row:
+            return None
+        if self.max_age is not None and time.time() - row[1] > self.max_age:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value):
+        """Store a JSON-serialisable value, evicting old entries every ``evict_every`` writes."""
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    conn.execute(
+                        'INSERT OR REPLACE INTO entries (key, value, stored_at) VALUES (?, ?, ?)',
+                        (key, json.dumps(value), now)
+                    )
+                    self._writes += 1
+                    if self._writes % self.evict_every == 0:
+                        self._evict(conn, now)
+                    conn.commit()
+                finally:
+                    conn.close()
+        except sqlite3.Error as e:
+            print(f"Cache write error ({self.path}): {e}")
+
+    def _evict(self, conn, now):
+        # Reads already skip expired entries, so eviction only has to bound the file size
+        if self.max_age is not None:
+            conn.execute('DELETE FROM entries WHERE stored_at < ?', (now - self.max_age,))
+        if self.max_entries is not None:
+            conn.execute(
+                'DELETE FROM entries WHERE stored_at < '
+                '(SELECT stored_at FROM entries ORDER BY stored_at DESC LIMIT 1 OFFSET ?)',
+                (self.max_entries - 1,)
+            )
+
+    def touch(self, key):
+        """Mark an entry as freshly stored without rewriting its value."""
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    conn.execute('UPDATE entries SET stored_at = ? WHERE key = ?', (time.time(), key))
+                    conn.commit()
+                finally:
+                    conn.close()
+        except sqlite3.Error as e:
+            print(f"Cache write error ({self.path}): {e}")
+
+    def clear(self):
+        """Remove every entry from the cache."""
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute('DELETE FROM entries')
+                conn.commit()
+            finally:
+                conn.close()
+
+def evict_files(directory, max_bytes, suffix=''):
+    """Delete the least recently used files under ``directory`` until it fits in ``max_bytes``.
+
+    Recency is the file's mtime, so readers should touch files on a hit.
+    Returns the size of the files left.
+    """
+    files = []
+    total = 0
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if not name.endswith(suffix):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+    if total <= max_bytes:
+        return total
+    for _, size, path in sorted(files):
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        if total <= max_bytes:
+            break
+    return total
+
+class DiskCacheBudget:
+    """Keeps a file cache directory under ``max_bytes`` using a running size total instead of a walk per write."""
+
+    def __init__(self, directory, max_bytes, suffix='', low_water=0.9):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.low_water = low_water
+        self.total = None
+        self.lock = threading.Lock()
+
+    def add(self, size):
+        """Record a newly stored file of ``size`` bytes, evicting if the cache is over budget."""
+        with self.lock:
+            if self.total is None:
+                # The first walk already counts the new file
+                self.total = evict_files(self.directory, self.max_bytes, self.suffix)
+            else:
+                self.total += size
+            if self.total > self.max_bytes:
+                self.total = evict_files(self.directory, int(self.max_bytes * self.low_water), self.suffix)
@@ -39,8 +39,29 @@ class Newsletter(db.Model):
     overall_summary = db.Column(db.Text)
     pdf_path = db.Column(db.String(500))
     audio_path = db.Column(db.String(500))
+    # JSON edition (articles, summary, theme) the PDF and audio are rendered from on demand
+    content = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+class Article(db.Model):
+    __tablename__ = 'articles'
+    __table_args__ = (
+        db.UniqueConstraint('feed_url', 'content_hash', name='uq_articles_feed_hash'),
+        db.Index('ix_articles_feed_published', 'feed_url', 'published_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), nullable=False, index=True)
+    feed_url = db.Column(db.String(500), nullable=False)
+    link = db.Column(db.String(1000))
+    title = db.Column(db.String(500), nullable=False)
+    summary = db.Column(db.Text)
+    source = db.Column(db.String(200))
+    image_url = db.Column(db.String(1000))
+    published = db.Column(db.String(50))
+    published_at = db.Column(db.DateTime)
+    fetched_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
 class AdminConfig(db.Model):
     __tablename__ = 'admin_config'
     
@@ -0,0 +1,116 @@
+import os
+import random
+import zlib
+from collections import defaultdict
+from functools import lru_cache
+from relevance import tokenize
+
+# Tuned on benchmarks/fixtures/duplicate_pairs.json (python -m benchmarks.bench_dedupe)
+DUPLICATE_THRESHOLD = float(os.environ.get('DUPLICATE_THRESHOLD', 0.35))
+
+# 32 bands of 2 rows make pairs at the threshold LSH candidates ~98% of the time
+NUM_PERM = 64
+LSH_BANDS = 32
+LSH_ROWS = NUM_PERM // LSH_BANDS
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+STOPWORDS = frozenset(
+    'a an and are as at be by for from has have he her his in is it its of on or '
+    'says said she that the their they this to was were will with after over new'.split()
+)
+
+def content_words(text):
+    return {token for token in tokenize(text) if token not in STOPWORDS}
+
+def article_shingles(article):
+    """Set of content words from an article's title and summary.
+
+    Title words are added a second time with a ``title:`` prefix, so
+    headlines weigh more than summaries: outlets paraphrase each other's
+    ledes far more than the names and numbers in their headlines.
+    """
+    title_words = content_words(article.get('title', ''))
+    shingles = title_words | content_words(article.get('summary', ''))
+    shingles.update(f'title:{word}' for word in title_words)
+    return shingles
+
+@lru_cache(maxsize=4096)
+def minhash(shingles):
+    """MinHash signature of a frozenset of shingles, memoized across requests."""
+    if not shingles:
+        return (0,) * NUM_PERM
+    hashes = [zlib.crc32(s.encode('utf-8')) for s in shingles]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def cluster_articles(articles, threshold=None, limit=None):
+    """Group near-duplicate articles, returning clusters as lists of indices.
+
+    Articles are visited in order and each one joins the first earlier
+    cluster whose representative it matches, or starts a new cluster.
+    Candidate representatives come from locality-sensitive hashing over
+    MinHash signatures, and each candidate is confirmed with the exact
+    Jaccard similarity of the two word sets. Comparing against the
+    representative rather than any member keeps unrelated stories from
+    being chained together. With ``limit``, clustering stops once that
+    many clusters exist.
+    """
+    threshold = DUPLICATE_THRESHOLD if threshold is None else threshold
+
+    clusters = []
+    cluster_of = {}
+    shingles = []
+    buckets = defaultdict(list)
+
+    for i, article in enumerate(articles):
+        if limit is not None and len(clusters) >= limit:
+            break
+        words = frozenset(article_shingles(article))
+        shingles.append(words)
+        keys = []
+        match = None
+
+        if words:
+            signature = minhash(words)
+            keys = [(band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]) for band in range(LSH_BANDS)]
+            candidates = sorted({rep for key in keys for rep in buckets.get(key, ())})
+            for rep in candidates:
+                if jaccard(words, shingles[rep]) >= threshold:
+                    match = rep
+                    break
+
+        if match is None:
+            cluster_of[i] = len(clusters)
+            clusters.append([i])
+            for key in keys:
+                buckets[key].append(i)
+        else:
+            clusters[cluster_of[match]].append(i)
+
+    return clusters
+
+def collapse_duplicates(articles, threshold=None, limit=None):
+    """Keep the first article of each near-duplicate cluster, up to ``limit`` of them.
+
+    The kept article gets an ``also_reported_by`` list naming the other
+    sources that carried the same story.
+    """
+    unique = []
+    for cluster in cluster_articles(articles, threshold, limit):
+        representative = articles[cluster[0]]
+        alternates = []
+        for i in cluster[1:]:
+            source = articles[i].get('source', '')
+            if source and source != representative.get('source') and source not in alternates:
+                alternates.append(source)
+        if alternates:
+            representative['also_reported_by'] = alternates
+        unique.append(representative)
+    return unique
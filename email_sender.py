@@ -5,24 +5,93 @@ from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
 from email import encoders
 
+SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.environ.get('SMTP_MAX_MESSAGES_PER_CONNECTION', 50))
+SMTP_TIMEOUT = float(os.environ.get('SMTP_TIMEOUT', 30))
+
 def is_smtp_configured():
     """Check if SMTP is properly configured."""
     return bool(os.environ.get('SMTP_EMAIL') and os.environ.get('SMTP_PASSWORD'))
 
-def send_newsletter_email(to_email, subject, body_html, pdf_path=None, audio_path=None):
-    """Send newsletter via SMTP email with attachments."""
+def is_connection_error(error):
+    """True if an SMTP error means the connection is gone, not that the message was refused."""
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code == 421
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+class SMTPSession:
+    """One authenticated SMTP connection reused for many messages.
+
+    The connection is opened on the first send, re-opened after
+    SMTP_MAX_MESSAGES_PER_CONNECTION messages (servers cap this), and
+    re-opened once and the message retried if the server has dropped it.
+    Use as a context manager so the connection is closed at the end.
+    """
     
-    smtp_host = os.environ.get('SMTP_HOST', 'smtp.gmail.com')
-    smtp_port = int(os.environ.get('SMTP_PORT', 587))
-    smtp_email = os.environ.get('SMTP_EMAIL')
-    smtp_password = os.environ.get('SMTP_PASSWORD')
+    def __init__(self, max_messages=None):
+        self.host = os.environ.get('SMTP_HOST', 'smtp.gmail.com')
+        self.port = int(os.environ.get('SMTP_PORT', 587))
+        self.email = os.environ.get('SMTP_EMAIL')
+        self.password = os.environ.get('SMTP_PASSWORD')
+        self.max_messages = SMTP_MAX_MESSAGES_PER_CONNECTION if max_messages is None else max_messages
+        self.server = None
+        self.sent_on_connection = 0
+        self.connections = 0
     
-    if not smtp_email or not smtp_password:
-        raise ValueError("SMTP credentials not configured. Please set SMTP_EMAIL and SMTP_PASSWORD in your environment variables.")
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
     
+    def connect(self):
+        if not self.email or not self.password:
+            raise ValueError("SMTP credentials not configured. Please set SMTP_EMAIL and SMTP_PASSWORD in your environment variables.")
+        self.close()
+        server = smtplib.SMTP(self.host, self.port, timeout=SMTP_TIMEOUT)
+        try:
+            server.starttls()
+            server.login(self.email, self.password)
+        except Exception:
+            server.close()
+            raise
+        self.server = server
+        self.sent_on_connection = 0
+        self.connections += 1
+    
+    def close(self):
+        if self.server is None:
+            return
+        try:
+            self.server.quit()
+        except Exception:
+            self.server.close()
+        self.server = None
+    
+    def send(self, to_email, msg):
+        """Send a message, connecting or reconnecting as needed."""
+        if self.server is None or (self.max_messages and self.sent_on_connection >= self.max_messages):
+            self.connect()
+            fresh = True
+        else:
+            fresh = False
+        
+        try:
+            self.server.sendmail(self.email, to_email, msg.as_string())
+        except Exception as e:
+            if fresh or not is_connection_error(e):
+                raise
+            print(f"SMTP connection lost ({e}), reconnecting")
+            self.connect()
+            self.server.sendmail(self.email, to_email, msg.as_string())
+        self.sent_on_connection += 1
+
+def build_newsletter_message(from_email, to_email, subject, body_html, pdf_path=None, audio_path=None):
+    """Build the newsletter email with its PDF and audio attachments."""
     msg = MIMEMultipart('alternative')
     msg['Subject'] = subject
-    msg['From'] = smtp_email
+    msg['From'] = from_email
     msg['To'] = to_email
     
     text_body = body_html.replace('<br>', '\n').replace('<br/>', '\n')
@@ -53,19 +122,45 @@ def send_newsletter_email(to_email, subject, body_html, pdf_path=None, audio_pat
             )
             msg.attach(audio_attachment)
     
+    return msg
+
+def send_newsletter_email(to_email, subject, body_html, pdf_path=None, audio_path=None, session=None):
+    """Send newsletter via SMTP email with attachments.
+
+    Pass an open SMTPSession as ``session`` to reuse its connection;
+    otherwise a connection is opened just for this message.
+    """
+    
+    smtp_email = os.environ.get('SMTP_EMAIL')
+    smtp_password = os.environ.get('SMTP_PASSWORD')
+    
+    if not smtp_email or not smtp_password:
+        raise ValueError("SMTP credentials not configured. Please set SMTP_EMAIL and SMTP_PASSWORD in your environment variables.")
+    
+    msg = build_newsletter_message(smtp_email, to_email, subject, body_html, pdf_path, audio_path)
+    
     try:
-        server = smtplib.SMTP(smtp_host, smtp_port)
-        server.starttls()
-        server.login(smtp_email, smtp_password)
-        server.sendmail(smtp_email, to_email, msg.as_string())
-        server.quit()
+        if session is not None:
+            session.send(to_email, msg)
+        else:
+            with SMTPSession() as single:
+                single.send(to_email, msg)
         return True
     except Exception as e:
         print(f"Email sending error: {e}")
         raise
 
-def create_newsletter_email_body(newsletter_title, overall_summary, article_count):
-    """Create HTML email body for newsletter."""
+def create_newsletter_email_body(newsletter_title, overall_summary, article_count, download_links=None):
+    """Create HTML email body for newsletter.
+
+    ``download_links`` lists ``(label, url)`` pairs for versions that aren't
+    attached; when given they replace the attachment note.
+    """
+    if download_links:
+        links = ' | '.join(f'<a href="{url}">{label}</a>' for label, url in download_links)
+        files_note = f"<p>Download your newsletter: {links}</p>"
+    else:
+        files_note = "<p>We've attached both the PDF and audio versions of your newsletter for your convenience.</p>"
     html = f"""
     <!DOCTYPE html>
     <html>
@@ -91,7 +186,7 @@ def create_newsletter_email_body(newsletter_title, overall_summary, article_coun
                 <p>{overall_summary}</p>
             </div>
             
-            <p>We've attached both the PDF and audio versions of your newsletter for your convenience.</p>
+            {files_note}
             <p>Enjoy your reading!</p>
         </div>
         <div class="footer">
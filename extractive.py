@@ -0,0 +1,102 @@
+import math
+import re
+from collections import Counter
+from relevance import tokenize
+from dedupe import STOPWORDS
+
+SENTENCE_RE = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9"\'“])')
+
+def split_sentences(text):
+    """Split text into sentences on terminal punctuation followed by a capital."""
+    return [s.strip() for s in SENTENCE_RE.split(text or '') if s.strip()]
+
+def sentence_vector(sentence, idf=None):
+    counts = Counter(token for token in tokenize(sentence) if token not in STOPWORDS)
+    if idf:
+        return {token: tf * idf.get(token, 1.0) for token, tf in counts.items()}
+    return dict(counts)
+
+def cosine(a, b):
+    if not a or not b:
+        return 0.0
+    if len(a) > len(b):
+        a, b = b, a
+    dot = sum(weight * b.get(token, 0.0) for token, weight in a.items())
+    if not dot:
+        return 0.0
+    norm_a = math.sqrt(sum(w * w for w in a.values()))
+    norm_b = math.sqrt(sum(w * w for w in b.values()))
+    return dot / (norm_a * norm_b)
+
+def rank_sentences(sentences):
+    """Score sentences by cosine similarity to the TF-IDF centroid of all of them.
+
+    The centroid stands for what the text is mostly about; sentences
+    close to it carry the main point. Earlier sentences get a small bonus
+    because news copy puts the key facts first.
+    """
+    token_sets = [set(tokenize(s)) for s in sentences]
+    total = len(sentences)
+    df = Counter(token for tokens in token_sets for token in tokens)
+    idf = {token: math.log((1 + total) / (1 + count)) + 1 for token, count in df.items()}
+
+    vectors = [sentence_vector(s, idf) for s in sentences]
+    centroid = Counter()
+    for vector in vectors:
+        centroid.update(vector)
+
+    return [
+        (cosine(vector, centroid) + 0.1 / (position + 1), vector)
+        for position, vector in enumerate(vectors)
+    ]
+
+def select_sentences(sentences, max_sentences, redundancy=0.6):
+    """Pick the best ``max_sentences`` sentences, skipping near-repeats, in original order."""
+    if len(sentences) <= max_sentences:
+        return sentences
+
+    scored = rank_sentences(sentences)
+    order = sorted(range(len(sentences)), key=lambda i: scored[i][0], reverse=True)
+
+    chosen = []
+    for i in order:
+        if any(cosine(scored[i][1], scored[j][1]) > redundancy for j in chosen):
+            continue
+        chosen.append(i)
+        if len(chosen) == max_sentences:
+            break
+
+    return [sentences[i] for i in sorted(chosen)]
+
+def summarize_text(text, max_sentences=2):
+    """Extractive summary of one text."""
+    sentences = split_sentences(text)
+    if not sentences:
+        return text or ''
+    return ' '.join(select_sentences(sentences, max_sentences))
+
+def summarize_collection(texts, max_sentences=3):
+    """Extractive summary across several texts, taking at most one sentence from each."""
+    candidates = []
+    owners = []
+    for owner, text in enumerate(texts):
+        for sentence in split_sentences(text):
+            candidates.append(sentence)
+            owners.append(owner)
+    if not candidates:
+        return ''
+
+    scored = rank_sentences(candidates)
+    order = sorted(range(len(candidates)), key=lambda i: scored[i][0], reverse=True)
+
+    chosen = []
+    used_owners = set()
+    for i in order:
+        if owners[i] in used_owners:
+            continue
+        chosen.append(i)
+        used_owners.add(owners[i])
+        if len(chosen) == max_sentences:
+            break
+
+    return ' '.join(candidates[i] for i in sorted(chosen))
@@ -0,0 +1,169 @@
+import os
+import json
+import threading
+import time
+from datetime import datetime
+
+RSS_FEEDS_FILE = os.environ.get('RSS_FEEDS_FILE', 'feeds.json')
+FEED_FAILURE_THRESHOLD = int(os.environ.get('FEED_FAILURE_THRESHOLD', 3))
+FEED_BREAKER_COOLDOWN = float(os.environ.get('FEED_BREAKER_COOLDOWN', 60))
+FEED_BREAKER_MAX_COOLDOWN = float(os.environ.get('FEED_BREAKER_MAX_COOLDOWN', 1800))
+
+DEFAULT_FEEDS = {
+    'technology': [
+        'https://feeds.bbci.co.uk/news/technology/rss.xml',
+        'https://rss.nytimes.com/services/xml/rss/nyt/Technology.xml',
+    ],
+    'business': [
+        'https://feeds.bbci.co.uk/news/business/rss.xml',
+        'https://rss.nytimes.com/services/xml/rss/nyt/Business.xml',
+    ],
+    'science': [
+        'https://feeds.bbci.co.uk/news/science_and_environment/rss.xml',
+        'https://rss.nytimes.com/services/xml/rss/nyt/Science.xml',
+    ],
+    'health': [
+        'https://feeds.bbci.co.uk/news/health/rss.xml',
+        'https://rss.nytimes.com/services/xml/rss/nyt/Health.xml',
+    ],
+    'world': [
+        'https://feeds.bbci.co.uk/news/world/rss.xml',
+        'https://rss.nytimes.com/services/xml/rss/nyt/World.xml',
+    ],
+    'sports': [
+        'https://feeds.bbci.co.uk/sport/rss.xml',
+        'https://rss.nytimes.com/services/xml/rss/nyt/Sports.xml',
+    ],
+    'entertainment': [
+        'https://feeds.bbci.co.uk/news/entertainment_and_arts/rss.xml',
+        'https://rss.nytimes.com/services/xml/rss/nyt/Arts.xml',
+    ],
+    'general': [
+        'https://feeds.bbci.co.uk/news/rss.xml',
+        'https://rss.nytimes.com/services/xml/rss/nyt/HomePage.xml',
+    ]
+}
+
+def load_feeds(path=None):
+    """Load the topic -> feed URLs map from a JSON file, or use the defaults."""
+    path = path or RSS_FEEDS_FILE
+    if path and os.path.exists(path):
+        try:
+            with open(path) as f:
+                feeds = json.load(f)
+            if 'general' not in feeds:
+                feeds['general'] = DEFAULT_FEEDS['general']
+            return feeds
+        except (OSError, ValueError) as e:
+            print(f"Error loading feed list {path}: {e}")
+    return {category: list(urls) for category, urls in DEFAULT_FEEDS.items()}
+
+def format_timestamp(ts):
+    return datetime.utcfromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S UTC') if ts else None
+
+class FeedHealth:
+    """Request statistics and circuit breaker state for one feed."""
+
+    def __init__(self):
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.avg_latency = None
+        self.last_success = None
+        self.last_failure = None
+        self.last_error = ''
+        self.open_until = 0.0
+        self.cooldown = 0.0
+        self.trial_in_flight = False
+
+    def state(self, now=None):
+        now = time.time() if now is None else now
+        if not self.open_until:
+            return 'closed'
+        return 'open' if now < self.open_until else 'half-open'
+
+    def to_dict(self):
+        return {
+            'state': self.state(),
+            'requests': self.requests,
+            'failures': self.failures,
+            'error_rate': round(self.failures / self.requests, 3) if self.requests else 0.0,
+            'consecutive_failures': self.consecutive_failures,
+            'avg_latency_ms': round(self.avg_latency * 1000) if self.avg_latency is not None else None,
+            'last_success': format_timestamp(self.last_success),
+            'last_failure': format_timestamp(self.last_failure),
+            'last_error': self.last_error,
+            'retry_at': format_timestamp(self.open_until)
+        }
+
+class FeedRegistry:
+    """Configured feeds plus per-feed health and a circuit breaker.
+
+    After FEED_FAILURE_THRESHOLD consecutive failures a feed's breaker
+    opens and the feed is skipped for a cooldown that doubles on every
+    further failure, up to FEED_BREAKER_MAX_COOLDOWN. Once the cooldown
+    has passed a single trial request is let through; success closes the
+    breaker again.
+    """
+
+    def __init__(self, feeds):
+        self.feeds = feeds
+        self.health = {}
+        self._lock = threading.Lock()
+
+    def all_feeds(self):
+        return sorted({url for urls in self.feeds.values() for url in urls})
+
+    def _health(self, feed_url):
+        if feed_url not in self.health:
+            self.health[feed_url] = FeedHealth()
+        return self.health[feed_url]
+
+    def is_available(self, feed_url):
+        """Return True if a request to the feed should be attempted now."""
+        with self._lock:
+            health = self._health(feed_url)
+            state = health.state()
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not health.trial_in_flight:
+                health.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self, feed_url, latency):
+        with self._lock:
+            health = self._health(feed_url)
+            health.requests += 1
+            health.consecutive_failures = 0
+            health.last_success = time.time()
+            health.avg_latency = latency if health.avg_latency is None else 0.8 * health.avg_latency + 0.2 * latency
+            health.open_until = 0.0
+            health.cooldown = 0.0
+            health.trial_in_flight = False
+
+    def record_failure(self, feed_url, error, latency=None):
+        with self._lock:
+            health = self._health(feed_url)
+            health.requests += 1
+            health.failures += 1
+            health.consecutive_failures += 1
+            health.last_failure = time.time()
+            health.last_error = str(error)[:200]
+            if latency is not None:
+                health.avg_latency = latency if health.avg_latency is None else 0.8 * health.avg_latency + 0.2 * latency
+
+            if health.trial_in_flight or health.consecutive_failures >= FEED_FAILURE_THRESHOLD:
+                if health.cooldown:
+                    health.cooldown = min(health.cooldown * 2, FEED_BREAKER_MAX_COOLDOWN)
+                else:
+                    health.cooldown = FEED_BREAKER_COOLDOWN
+                health.open_until = health.last_failure + health.cooldown
+                health.trial_in_flight = False
+
+    def snapshot(self):
+        """Health of every configured feed, for the admin view and API."""
+        with self._lock:
+            return {url: self._health(url).to_dict() for url in self.all_feeds()}
+
+registry = FeedRegistry(load_feeds())
@@ -0,0 +1,85 @@
+import os
+import hashlib
+import threading
+from io import BytesIO
+from PIL import Image as PILImage
+from cache import CACHE_DIR, DiskCacheBudget, SQLiteCache
+from news_fetcher import download_page
+
+IMAGE_CACHE_DIR = os.environ.get('IMAGE_CACHE_DIR', os.path.join(CACHE_DIR, 'images'))
+IMAGE_CACHE_MAX_BYTES = int(os.environ.get('IMAGE_CACHE_MAX_BYTES', 200 * 1024 * 1024))
+IMAGE_CACHE_MAX_AGE = float(os.environ.get('IMAGE_CACHE_MAX_AGE', 30 * 24 * 3600))
+IMAGE_DOWNLOAD_MAX_BYTES = int(os.environ.get('IMAGE_DOWNLOAD_MAX_BYTES', 10 * 1024 * 1024))
+IMAGE_JPEG_QUALITY = int(os.environ.get('IMAGE_JPEG_QUALITY', 80))
+
+# URL -> thumbnail file; the thumbnails themselves are stored by content hash
+image_index = SQLiteCache('image_urls', max_age=IMAGE_CACHE_MAX_AGE, max_entries=20000)
+image_cache_budget = DiskCacheBudget(IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES, suffix='.jpg')
+
+def make_thumbnail(data, max_width=400, max_height=200, quality=None):
+    """Downscale image bytes to fit ``max_width`` x ``max_height`` and re-encode as JPEG.
+
+    Returns ``(jpeg_bytes, width, height)``. Transparent images are
+    flattened onto white.
+    """
+    quality = IMAGE_JPEG_QUALITY if quality is None else quality
+    with PILImage.open(BytesIO(data)) as img:
+        img.draft('RGB', (max_width, max_height))
+        img.thumbnail((max_width, max_height), PILImage.LANCZOS)
+        if img.mode in ('RGBA', 'LA', 'P'):
+            img = img.convert('RGBA')
+            background = PILImage.new('RGB', img.size, (255, 255, 255))
+            background.paste(img, mask=img.getchannel('A'))
+            img = background
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+
+        out = BytesIO()
+        img.save(out, 'JPEG', quality=quality, optimize=True, progressive=True)
+        return out.getvalue(), img.width, img.height
+
+def thumbnail_path(digest):
+    return os.path.join(IMAGE_CACHE_DIR, digest[:2], f'{digest}.jpg')
+
+def store_thumbnail(data):
+    """Write thumbnail bytes under their content hash and return the path."""
+    path = thumbnail_path(hashlib.sha256(data).hexdigest())
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        image_cache_budget.add(len(data))
+    return path
+
+def get_thumbnail(url, max_width=400, max_height=200, timeout=10, quality=None):
+    """Return ``(path, width, height)`` of a cached JPEG thumbnail for an image URL.
+
+    The image is downloaded and downscaled on the first request for a
+    given URL, size and JPEG quality; later requests only read the file.
+    Returns None if the image can't be fetched or decoded.
+    """
+    quality = IMAGE_JPEG_QUALITY if quality is None else quality
+    key = f'{max_width}x{max_height}q{quality}:{url}'
+    cached = image_index.get(key)
+    if cached:
+        entry = cached[0]
+        path = thumbnail_path(entry['digest'])
+        try:
+            os.utime(path)
+            return path, entry['width'], entry['height']
+        except OSError:
+            pass
+
+    try:
+        data = download_page(url, timeout=timeout, max_bytes=IMAGE_DOWNLOAD_MAX_BYTES)
+        thumbnail, width, height = make_thumbnail(data, max_width, max_height, quality)
+    except Exception as e:
+        print(f"Error downloading image: {e}")
+        return None
+
+    path = store_thumbnail(thumbnail)
+    digest = os.path.basename(path)[:-4]
+    image_index.set(key, {'digest': digest, 'width': width, 'height': height})
+    return path, width, height
@@ -0,0 +1,75 @@
+"""Minimal MPEG audio frame handling for joining MP3 files without re-encoding."""
+
+# Layer III bitrates in kbps by bitrate index, for MPEG-1 and MPEG-2/2.5
+BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+SAMPLE_RATES = {
+    1: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    2.5: [11025, 12000, 8000],
+}
+VERSIONS = {0b00: 2.5, 0b10: 2, 0b11: 1}
+
+def frame_length(header):
+    """Byte length of the Layer III frame starting with the 4-byte ``header``, or 0 if it isn't one."""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return 0
+    version = VERSIONS.get((header[1] >> 3) & 0b11)
+    layer = (header[1] >> 1) & 0b11
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0b11
+    if version is None or layer != 0b01 or bitrate_index in (0, 15) or rate_index == 3:
+        return 0
+
+    bitrate = BITRATES[1 if version == 1 else 2][bitrate_index] * 1000
+    sample_rate = SAMPLE_RATES[version][rate_index]
+    padding = (header[2] >> 1) & 1
+    return (144 if version == 1 else 72) * bitrate // sample_rate + padding
+
+def skip_id3v2(data):
+    """Offset of the first byte after a leading ID3v2 tag (0 if there isn't one)."""
+    if len(data) < 10 or data[:3] != b'ID3':
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+def is_info_frame(frame):
+    """True for a Xing/Info or VBRI header frame, which carries no audio."""
+    version = VERSIONS.get((frame[1] >> 3) & 0b11)
+    mono = frame[3] >> 6 == 0b11
+    if version == 1:
+        offset = 21 if mono else 36
+    else:
+        offset = 13 if mono else 21
+    return frame[offset:offset + 4] in (b'Xing', b'Info') or frame[36:40] == b'VBRI'
+
+def audio_frames(data):
+    """The MPEG audio frames of an MP3 file as one bytes object.
+
+    ID3v1/ID3v2 tags and a leading Xing/Info/VBRI header frame (which
+    stores the frame count of its own file only) are dropped, so the
+    result can be appended to other files' frames.
+    """
+    start = skip_id3v2(data)
+    end = len(data)
+    if end - start >= 128 and data[end - 128:end - 125] == b'TAG':
+        end -= 128
+
+    # Resync on the first valid frame header
+    while start < end - 4 and not frame_length(data[start:start + 4]):
+        start += 1
+    if start >= end - 4:
+        return b''
+
+    length = frame_length(data[start:start + 4])
+    if is_info_frame(data[start:start + length]):
+        start += length
+
+    return data[start:end]
+
+def concat(parts):
+    """Join MP3 files by concatenating their audio frames."""
+    return b''.join(audio_frames(part) for part in parts)
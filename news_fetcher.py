@@ -1,131 +1,292 @@
+import os
 import requests
 from bs4 import BeautifulSoup
 import feedparser
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
+from html.parser import HTMLParser
 import re
+import threading
+import time
+from cache import SQLiteCache
+from relevance import score_articles
+from dedupe import collapse_duplicates
+from feed_registry import registry
 
-def fetch_news(topics, limit=10):
+FEED_FETCH_WORKERS = int(os.environ.get('FEED_FETCH_WORKERS', 8))
+FEED_TIMEOUT = float(os.environ.get('FEED_TIMEOUT', 10))
+FETCH_DEADLINE = float(os.environ.get('FETCH_DEADLINE', 20))
+FEED_CACHE_TTL = float(os.environ.get('FEED_CACHE_TTL', 300))
+FEED_CACHE_MAX_AGE = float(os.environ.get('FEED_CACHE_MAX_AGE', 7 * 24 * 3600))
+
+SCRAPE_WORKERS = int(os.environ.get('SCRAPE_WORKERS', 8))
+SCRAPE_MAX_BYTES = int(os.environ.get('SCRAPE_MAX_BYTES', 2 * 1024 * 1024))
+SCRAPE_CACHE_MAX_AGE = float(os.environ.get('SCRAPE_CACHE_MAX_AGE', 7 * 24 * 3600))
+
+feed_cache = SQLiteCache('feeds', max_age=FEED_CACHE_MAX_AGE)
+scrape_cache = SQLiteCache('scraped_articles', max_age=SCRAPE_CACHE_MAX_AGE, max_entries=5000)
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+def fetch_news(topics, limit=10, workers=None, timeout=None, deadline=None):
     """Fetch news articles from multiple RSS feeds based on topics."""
+    articles, _ = fetch_news_with_status(topics, limit, workers=workers, timeout=timeout, deadline=deadline)
+    return articles
+
+def fetch_news_with_status(topics, limit=10, workers=None, timeout=None, deadline=None):
+    """Fetch news within a time budget and report which feeds missed it.
+
+    Feeds are downloaded concurrently on up to ``workers`` threads, each
+    with a ``timeout`` in seconds. Once ``deadline`` seconds have passed the
+    articles that have arrived are ranked and returned, and feeds still in
+    flight are abandoned. Results are merged in feed order so the dedupe
+    and scoring see the same input as a sequential fetch.
+
+    Returns ``(articles, dropped_feeds)``.
+    """
     all_articles = []
+    workers = FEED_FETCH_WORKERS if workers is None else workers
+    timeout = FEED_TIMEOUT if timeout is None else timeout
+    deadline = FETCH_DEADLINE if deadline is None else deadline
+    if deadline:
+        timeout = min(timeout, deadline)
+    started = time.time()
     
-    rss_feeds = {
-        'technology': [
-            'https://feeds.bbci.co.uk/news/technology/rss.xml',
-            'https://rss.nytimes.com/services/xml/rss/nyt/Technology.xml',
-        ],
-        'business': [
-            'https://feeds.bbci.co.uk/news/business/rss.xml',
-            'https://rss.nytimes.com/services/xml/rss/nyt/Business.xml',
-        ],
-        'science': [
-            'https://feeds.bbci.co.uk/news/science_and_environment/rss.xml',
-            'https://rss.nytimes.com/services/xml/rss/nyt/Science.xml',
-        ],
-        'health': [
-            'https://feeds.bbci.co.uk/news/health/rss.xml',
-            'https://rss.nytimes.com/services/xml/rss/nyt/Health.xml',
-        ],
-        'world': [
-            'https://feeds.bbci.co.uk/news/world/rss.xml',
-            'https://rss.nytimes.com/services/xml/rss/nyt/World.xml',
-        ],
-        'sports': [
-            'https://feeds.bbci.co.uk/sport/rss.xml',
-            'https://rss.nytimes.com/services/xml/rss/nyt/Sports.xml',
-        ],
-        'entertainment': [
-            'https://feeds.bbci.co.uk/news/entertainment_and_arts/rss.xml',
-            'https://rss.nytimes.com/services/xml/rss/nyt/Arts.xml',
-        ],
-        'general': [
-            'https://feeds.bbci.co.uk/news/rss.xml',
-            'https://rss.nytimes.com/services/xml/rss/nyt/HomePage.xml',
-        ]
-    }
+    feeds_to_check = feeds_for_topics(topics)
     
+    def fetch_feed(feed_url, feed_timeout=timeout):
+        try:
+            return parse_rss_feed(feed_url, topics, timeout=feed_timeout)
+        except Exception as e:
+            print(f"Error fetching feed {feed_url}: {e}")
+            return []
+    
+    results = {}
+    if workers > 1 and len(feeds_to_check) > 1:
+        executor = ThreadPoolExecutor(max_workers=min(workers, len(feeds_to_check)))
+        futures = {executor.submit(fetch_feed, feed_url): feed_url for feed_url in feeds_to_check}
+        done, _ = wait(futures, timeout=deadline or None)
+        for future in done:
+            results[futures[future]] = future.result()
+        # Don't block on stragglers; their own request timeouts will end them
+        executor.shutdown(wait=False, cancel_futures=True)
+    else:
+        for feed_url in feeds_to_check:
+            remaining = deadline - (time.time() - started) if deadline else timeout
+            if remaining <= 0:
+                break
+            results[feed_url] = fetch_feed(feed_url, min(timeout, remaining))
+    
+    dropped_feeds = [feed_url for feed_url in feeds_to_check if feed_url not in results]
+    if dropped_feeds:
+        print(f"Feeds dropped after {deadline}s deadline: {', '.join(dropped_feeds)}")
+    
+    for feed_url in feeds_to_check:
+        all_articles.extend(results.get(feed_url, []))
+    
+    return rank_articles(all_articles, topics, limit), dropped_feeds
+
+def feeds_for_topics(topics):
+    """Map user topics onto the RSS feed URLs that cover them."""
     feeds_to_check = []
     for topic in topics:
         topic_lower = topic.lower().strip()
         matched = False
-        for category, urls in rss_feeds.items():
+        for category, urls in registry.feeds.items():
             if topic_lower in category or category in topic_lower:
                 feeds_to_check.extend(urls)
                 matched = True
                 break
         if not matched:
-            feeds_to_check.extend(rss_feeds['general'])
-    
-    feeds_to_check = list(set(feeds_to_check))
-    
-    for feed_url in feeds_to_check:
-        try:
-            articles = parse_rss_feed(feed_url, topics)
-            all_articles.extend(articles)
-        except Exception as e:
-            print(f"Error fetching feed {feed_url}: {e}")
-            continue
+            feeds_to_check.extend(registry.feeds['general'])
     
+    return list(set(feeds_to_check))
+
+def rank_articles(articles, topics, limit=10, scores=None):
+    """Drop duplicate stories, score articles against topics and keep the best.
+
+    Exact title repeats are dropped first. After scoring, near-duplicates
+    (the same story from several outlets) are collapsed onto their best
+    scoring copy so downstream summaries, images and audio are made once.
+    ``scores`` can carry relevance scores already computed for ``articles``
+    (e.g. from an index kept across requests); otherwise they're scored here.
+    """
     seen_titles = set()
-    unique_articles = []
-    for article in all_articles:
+    unique = []
+    for i, article in enumerate(articles):
         if article['title'] not in seen_titles:
             seen_titles.add(article['title'])
-            unique_articles.append(article)
+            unique.append(i)
+    unique_articles = [articles[i] for i in unique]
+    if scores is None:
+        unique_scores = score_articles(unique_articles, topics)
+    else:
+        unique_scores = [scores[i] for i in unique]
     
     scored_articles = []
-    for article in unique_articles:
-        score = calculate_relevance(article, topics)
-        article['relevance_score'] = score
+    for article, score in zip(unique_articles, unique_scores):
+        article['relevance_score'] = round(score, 4)
         scored_articles.append(article)
     
     scored_articles.sort(key=lambda x: x['relevance_score'], reverse=True)
+    scored_articles = collapse_duplicates(scored_articles, limit=limit)
     
     return scored_articles[:limit]
 
-def parse_rss_feed(feed_url, topics):
-    """Parse an RSS feed and extract articles with images."""
-    articles = []
+def download_feed(feed_url, timeout=None, etag=None, modified=None):
+    """Download and parse an RSS feed, bounded by a socket timeout.
+
+    When ``etag`` or ``modified`` are given the request is conditional, and
+    ``None`` is returned if the server answers 304 Not Modified. Otherwise
+    returns ``(feed, etag, modified)`` with the validators for next time.
+    """
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    }
+    if etag:
+        headers['If-None-Match'] = etag
+    if modified:
+        headers['If-Modified-Since'] = modified
     
+    response = requests.get(feed_url, headers=headers, timeout=timeout or FEED_TIMEOUT)
+    if response.status_code == 304:
+        return None
+    response.raise_for_status()
+    
+    feed = feedparser.parse(response.content, response_headers=response.headers)
+    return feed, response.headers.get('ETag'), response.headers.get('Last-Modified')
+
+def parse_rss_feed(feed_url, topics, timeout=None):
+    """Parse an RSS feed and extract articles with images.
+
+    Parsed articles are kept in the persistent feed cache. Within
+    FEED_CACHE_TTL seconds the cached copy is returned without any network
+    access; after that the feed is revalidated with a conditional GET and
+    only re-parsed when it has actually changed.
+
+    Every network attempt is reported to the feed registry. While a feed's
+    circuit breaker is open it is not contacted at all and the last cached
+    copy, if any, is returned instead.
+    """
+    cached = feed_cache.get(feed_url)
+    if cached:
+        entry, stored_at = cached
+        if time.time() - stored_at < FEED_CACHE_TTL:
+            return entry['articles']
+    else:
+        entry = None
+    
+    if not registry.is_available(feed_url):
+        return entry['articles'] if entry else []
+    
+    started = time.time()
     try:
-        feed = feedparser.parse(feed_url)
+        result = download_feed(
+            feed_url,
+            timeout=timeout,
+            etag=entry.get('etag') if entry else None,
+            modified=entry.get('modified') if entry else None
+        )
+        if result is None:
+            registry.record_success(feed_url, time.time() - started)
+            feed_cache.touch(feed_url)
+            return entry['articles']
+        
+        feed, etag, modified = result
+        articles = extract_articles(feed)
+        registry.record_success(feed_url, time.time() - started)
+        feed_cache.set(feed_url, {'etag': etag, 'modified': modified, 'articles': articles})
+        return articles
         
-        for entry in feed.entries[:20]:
-            title = entry.get('title', '')
-            summary = entry.get('summary', entry.get('description', ''))
-            
-            image_url = extract_image_from_entry(entry, summary)
-            
-            summary = BeautifulSoup(summary, 'html.parser').get_text()
-            summary = re.sub(r'\s+', ' ', summary).strip()
-            
-            link = entry.get('link', '')
-            
-            published = entry.get('published', entry.get('updated', ''))
-            try:
-                if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                    pub_date = datetime(*entry.published_parsed[:6])
-                    published = pub_date.strftime('%B %d, %Y')
-            except:
-                published = datetime.now().strftime('%B %d, %Y')
-            
-            source = feed.feed.get('title', 'Unknown Source')
-            
-            articles.append({
-                'title': title,
-                'summary': summary[:500] if summary else '',
-                'link': link,
-                'image_url': image_url,
-                'published': published,
-                'source': source
-            })
-            
     except Exception as e:
-        print(f"Error parsing RSS feed: {e}")
+        registry.record_failure(feed_url, e, time.time() - started)
+        print(f"Error parsing RSS feed {feed_url}: {e}")
+        # Serve the stale copy rather than nothing if the feed is unreachable
+        return entry['articles'] if entry else []
+
+def extract_articles(feed):
+    """Extract article dicts from a parsed feed."""
+    articles = []
+    
+    for entry in feed.entries[:20]:
+        title = entry.get('title', '')
+        summary = entry.get('summary', entry.get('description', ''))
+        
+        summary, inline_image = clean_summary_html(summary)
+        image_url = extract_media_image(entry) or inline_image
+        
+        link = entry.get('link', '')
+        
+        published = entry.get('published', entry.get('updated', ''))
+        published_at = None
+        try:
+            if hasattr(entry, 'published_parsed') and entry.published_parsed:
+                pub_date = datetime(*entry.published_parsed[:6])
+                published = pub_date.strftime('%B %d, %Y')
+                published_at = pub_date.isoformat()
+        except:
+            published = datetime.now().strftime('%B %d, %Y')
+        
+        source = feed.feed.get('title', 'Unknown Source')
+        
+        articles.append({
+            'title': title,
+            'summary': summary[:500] if summary else '',
+            'link': link,
+            'image_url': image_url,
+            'published': published,
+            'published_at': published_at,
+            'source': source
+        })
     
     return articles
 
-def extract_image_from_entry(entry, summary_html):
-    """Extract image URL from RSS entry."""
+class SummaryHTMLParser(HTMLParser):
+    """Single streaming pass over summary HTML.
+
+    Collects the visible text (what BeautifulSoup's get_text() would
+    return) and the src of the first <img>, without building a tree.
+    """
+    
+    SKIPPED_TAGS = {'script', 'style', 'template'}
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.image_url = None
+        self._skip_depth = 0
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag == 'img' and self.image_url is None:
+            self.image_url = dict(attrs).get('src') or ''
+    
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+    
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+def clean_summary_html(summary_html):
+    """Return ``(plain_text, first_image_url)`` for an entry summary."""
+    if not summary_html:
+        return '', ''
+    
+    # Most feeds send plain text summaries; skip the parser entirely for those
+    if '<' not in summary_html and '&' not in summary_html:
+        return ' '.join(summary_html.split()), ''
+    
+    parser = SummaryHTMLParser()
+    parser.feed(summary_html)
+    parser.close()
+    return ' '.join(''.join(parser.parts).split()), parser.image_url or ''
+
+def extract_media_image(entry):
+    """Extract an image URL from an entry's media or enclosure elements."""
     if hasattr(entry, 'media_content') and entry.media_content:
         for media in entry.media_content:
             if media.get('medium') == 'image' or media.get('type', '').startswith('image'):
@@ -139,16 +300,17 @@ def extract_image_from_entry(entry, summary_html):
             if enc.get('type', '').startswith('image'):
                 return enc.get('href', enc.get('url', ''))
     
-    if summary_html:
-        soup = BeautifulSoup(summary_html, 'html.parser')
-        img = soup.find('img')
-        if img and img.get('src'):
-            return img['src']
-    
     return ''
 
+def extract_image_from_entry(entry, summary_html):
+    """Extract image URL from RSS entry."""
+    return extract_media_image(entry) or clean_summary_html(summary_html)[1]
+
 def calculate_relevance(article, topics):
-    """Calculate relevance score based on topic matching."""
+    """Calculate relevance score based on topic matching.
+
+    Superseded by relevance.score_articles; kept for comparison benchmarks.
+    """
     score = 0
     text = (article['title'] + ' ' + article['summary']).lower()
     
@@ -165,26 +327,76 @@ def calculate_relevance(article, topics):
     
     return score
 
-def scrape_article_content(url):
-    """Scrape full article content from URL."""
+def get_http_session():
+    """Shared requests session whose connection pool is reused across scrapes."""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=32, pool_maxsize=max(SCRAPE_WORKERS, 10))
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['User-Agent'] = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            _http_session = session
+        return _http_session
+
+def download_page(url, timeout=10, max_bytes=None):
+    """Stream a page body, stopping once ``max_bytes`` have been read."""
+    max_bytes = SCRAPE_MAX_BYTES if max_bytes is None else max_bytes
+    chunks = []
+    size = 0
+    with get_http_session().get(url, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes:
+                break
+    return b''.join(chunks)[:max_bytes]
+
+def extract_article_text(html):
+    """Pull the paragraph text out of an article page."""
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    for tag in soup(['script', 'style', 'nav', 'header', 'footer', 'aside']):
+        tag.decompose()
+    
+    article = soup.find('article') or soup.find('main') or soup.find('body')
+    
+    if article:
+        paragraphs = article.find_all('p')
+        content = ' '.join(p.get_text() for p in paragraphs)
+        return re.sub(r'\s+', ' ', content).strip()
+    
+    return ''
+
+def scrape_article_content(url, timeout=10, max_bytes=None):
+    """Scrape full article content from URL.
+
+    Extracted text is cached by URL, so an article is only downloaded once.
+    """
+    cached = scrape_cache.get(url)
+    if cached:
+        return cached[0]
+    
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        for tag in soup(['script', 'style', 'nav', 'header', 'footer', 'aside']):
-            tag.decompose()
-        
-        article = soup.find('article') or soup.find('main') or soup.find('body')
-        
-        if article:
-            paragraphs = article.find_all('p')
-            content = ' '.join(p.get_text() for p in paragraphs)
-            return re.sub(r'\s+', ' ', content).strip()
-        
-        return ''
+        content = extract_article_text(download_page(url, timeout=timeout, max_bytes=max_bytes))
     except Exception as e:
         print(f"Error scraping article: {e}")
         return ''
+    
+    scrape_cache.set(url, content)
+    return content
+
+def scrape_articles(urls, workers=None, timeout=10, max_bytes=None):
+    """Scrape many article URLs concurrently. Returns a dict of URL -> text."""
+    workers = SCRAPE_WORKERS if workers is None else workers
+    urls = list(dict.fromkeys(url for url in urls if url))
+    if not urls:
+        return {}
+    
+    def scrape(url):
+        return scrape_article_content(url, timeout=timeout, max_bytes=max_bytes)
+    
+    with ThreadPoolExecutor(max_workers=min(workers, len(urls))) as executor:
+        return dict(zip(urls, executor.map(scrape, urls)))
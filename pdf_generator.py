@@ -4,10 +4,38 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, HRFlowable, Image
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+from functools import lru_cache
+import copy
+import hashlib
+import json
+import multiprocessing
 import os
-import requests
-from io import BytesIO
+import threading
+from image_cache import get_thumbnail
+
+IMAGE_FETCH_WORKERS = int(os.environ.get('IMAGE_FETCH_WORKERS', 8))
+IMAGE_FETCH_TIMEOUT = float(os.environ.get('IMAGE_FETCH_TIMEOUT', 10))
+IMAGE_FETCH_DEADLINE = float(os.environ.get('IMAGE_FETCH_DEADLINE', 12))
+PDF_FLOWABLE_CACHE_SIZE = int(os.environ.get('PDF_FLOWABLE_CACHE_SIZE', 2000))
+PDF_RENDER_PROCESSES = int(os.environ.get('PDF_RENDER_PROCESSES', 0)) or os.cpu_count() or 1
+PDF_PROFILE = os.environ.get('PDF_PROFILE', 'standard')
+
+# Output profiles: image box in points (images are rendered at 72 dpi),
+# JPEG quality (None uses IMAGE_JPEG_QUALITY) and whether images are included
+PDF_PROFILES = {
+    'standard': {'image_size': (400, 200), 'jpeg_quality': None, 'images': True},
+    'compact': {'image_size': (240, 120), 'jpeg_quality': 55, 'images': True},
+    'text': {'image_size': (240, 120), 'jpeg_quality': 55, 'images': False},
+}
+
+_flowable_cache = OrderedDict()
+_flowable_cache_lock = threading.Lock()
+_render_pool = None
+_render_pool_lock = threading.Lock()
 
 def hex_to_rgb(hex_color):
     """Convert hex color to RGB tuple (0-1 range)."""
@@ -27,42 +55,64 @@ def get_font_family(font_style):
     }
     return fonts.get(font_style, 'Helvetica')
 
-def download_image(url, max_width=400, max_height=200):
-    """Download and resize image from URL."""
-    try:
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code == 200:
-            img_data = BytesIO(response.content)
-            img = Image(img_data)
-            
-            aspect = img.imageWidth / img.imageHeight
-            if img.imageWidth > max_width:
-                img.drawWidth = max_width
-                img.drawHeight = max_width / aspect
-            if img.drawHeight > max_height:
-                img.drawHeight = max_height
-                img.drawWidth = max_height * aspect
-            
-            return img
-    except Exception as e:
-        print(f"Error downloading image: {e}")
-    return None
-
-def generate_pdf(articles, output_path, primary_color='#1a73e8', secondary_color='#4285f4', font_style='modern', overall_summary=''):
-    """Generate a styled PDF newsletter with links and images."""
+def prefetch_images(urls, workers=None, timeout=None, deadline=None, max_width=400, max_height=200, quality=None):
+    """Fetch article images concurrently within a time budget.
+
+    Images are downloaded on up to ``workers`` threads, each with a
+    ``timeout`` in seconds, and shrunk to fit ``max_width`` x
+    ``max_height`` at JPEG ``quality``. Whatever has arrived after ``deadline``
+    seconds is returned and the rest is left out of the PDF; downloads
+    still running finish in the background and land in the image cache
+    for the next edition.
+
+    Returns ``{url: (path, width, height)}``.
+    """
+    workers = IMAGE_FETCH_WORKERS if workers is None else workers
+    timeout = IMAGE_FETCH_TIMEOUT if timeout is None else timeout
+    deadline = IMAGE_FETCH_DEADLINE if deadline is None else deadline
+    if deadline:
+        timeout = min(timeout, deadline)
     
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    urls = list(dict.fromkeys(url for url in urls if url))
+    if not urls:
+        return {}
     
-    doc = SimpleDocTemplate(
-        output_path,
-        pagesize=letter,
-        rightMargin=0.75*inch,
-        leftMargin=0.75*inch,
-        topMargin=0.75*inch,
-        bottomMargin=0.75*inch
-    )
+    executor = ThreadPoolExecutor(max_workers=max(min(workers, len(urls)), 1))
+    futures = {
+        executor.submit(get_thumbnail, url, max_width, max_height, timeout=timeout, quality=quality): url
+        for url in urls
+    }
+    done, pending = wait(futures, timeout=deadline or None)
+    executor.shutdown(wait=False, cancel_futures=True)
+    
+    if pending:
+        print(f"Skipped {len(pending)} images that missed the {deadline}s deadline")
     
+    thumbnails = {}
+    for future in done:
+        thumbnail = future.result()
+        if thumbnail:
+            thumbnails[futures[future]] = thumbnail
+    return thumbnails
+
+def escape_markup(text):
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+def article_key(article):
+    """Hash of the article fields that appear in the PDF."""
+    fields = [
+        article.get('title', 'Untitled'),
+        article.get('source', 'Unknown'),
+        article.get('published', 'Today'),
+        article.get('also_reported_by') or [],
+        article.get('simplified_summary', article.get('original_summary', '')),
+        article.get('link', '')
+    ]
+    return hashlib.sha256(json.dumps(fields, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+@lru_cache(maxsize=64)
+def get_pdf_styles(primary_color, secondary_color, font_style):
+    """Paragraph styles for one theme, built once and shared by every PDF using it."""
     primary_rgb = hex_to_rgb(primary_color)
     secondary_rgb = hex_to_rgb(secondary_color)
     primary = colors.Color(*primary_rgb)
@@ -73,83 +123,194 @@ def generate_pdf(articles, output_path, primary_color='#1a73e8', secondary_color
     
     styles = getSampleStyleSheet()
     
-    title_style = ParagraphStyle(
-        'NewsletterTitle',
-        parent=styles['Heading1'],
-        fontName=font_bold,
-        fontSize=28,
-        textColor=primary,
-        alignment=TA_CENTER,
-        spaceAfter=6
-    )
+    return {
+        'primary': primary,
+        'secondary': secondary,
+        'title': ParagraphStyle(
+            'NewsletterTitle',
+            parent=styles['Heading1'],
+            fontName=font_bold,
+            fontSize=28,
+            textColor=primary,
+            alignment=TA_CENTER,
+            spaceAfter=6
+        ),
+        'date': ParagraphStyle(
+            'DateStyle',
+            parent=styles['Normal'],
+            fontName=font_family,
+            fontSize=12,
+            textColor=colors.gray,
+            alignment=TA_CENTER,
+            spaceAfter=20
+        ),
+        'highlight': ParagraphStyle(
+            'HighlightTitle',
+            parent=styles['Normal'],
+            fontName=font_bold,
+            fontSize=14,
+            textColor=primary,
+            spaceAfter=10
+        ),
+        'summary': ParagraphStyle(
+            'SummaryStyle',
+            parent=styles['Normal'],
+            fontName=font_family,
+            fontSize=11,
+            textColor=colors.darkgray,
+            alignment=TA_JUSTIFY,
+            spaceAfter=20,
+            spaceBefore=10,
+            leading=16,
+            backColor=colors.Color(0.95, 0.95, 0.95),
+            borderPadding=10
+        ),
+        'intro': ParagraphStyle(
+            'IntroStyle',
+            parent=styles['Normal'],
+            fontName=font_family,
+            fontSize=12,
+            textColor=colors.darkgray,
+            alignment=TA_CENTER,
+            spaceAfter=25
+        ),
+        'article_title': ParagraphStyle(
+            'ArticleTitle',
+            parent=styles['Heading2'],
+            fontName=font_bold,
+            fontSize=14,
+            textColor=primary,
+            spaceBefore=15,
+            spaceAfter=6
+        ),
+        'source': ParagraphStyle(
+            'SourceStyle',
+            parent=styles['Normal'],
+            fontName=font_family,
+            fontSize=9,
+            textColor=secondary,
+            spaceAfter=6
+        ),
+        'body': ParagraphStyle(
+            'BodyStyle',
+            parent=styles['Normal'],
+            fontName=font_family,
+            fontSize=11,
+            textColor=colors.black,
+            alignment=TA_JUSTIFY,
+            spaceAfter=8,
+            leading=14
+        ),
+        'link': ParagraphStyle(
+            'LinkStyle',
+            parent=styles['Normal'],
+            fontName=font_family,
+            fontSize=10,
+            textColor=secondary,
+            spaceAfter=12
+        ),
+        'footer': ParagraphStyle(
+            'FooterStyle',
+            parent=styles['Normal'],
+            fontName=font_family,
+            fontSize=9,
+            textColor=colors.gray,
+            alignment=TA_CENTER
+        )
+    }
+
+def build_article_flowables(article, styles):
+    """Parsed paragraphs for one article: ``(header, body)``, split where the image goes."""
+    header = [Paragraph(escape_markup(article.get('title', 'Untitled')), styles['article_title'])]
     
-    date_style = ParagraphStyle(
-        'DateStyle',
-        parent=styles['Normal'],
-        fontName=font_family,
-        fontSize=12,
-        textColor=colors.gray,
-        alignment=TA_CENTER,
-        spaceAfter=20
-    )
+    source_text = f"{article.get('source', 'Unknown')} | {article.get('published', 'Today')}"
+    if article.get('also_reported_by'):
+        source_text += f" | Also in: {', '.join(article['also_reported_by'])}"
+    header.append(Paragraph(source_text, styles['source']))
     
-    summary_style = ParagraphStyle(
-        'SummaryStyle',
-        parent=styles['Normal'],
-        fontName=font_family,
-        fontSize=11,
-        textColor=colors.darkgray,
-        alignment=TA_JUSTIFY,
-        spaceAfter=20,
-        spaceBefore=10,
-        leading=16,
-        backColor=colors.Color(0.95, 0.95, 0.95),
-        borderPadding=10
-    )
+    summary = article.get('simplified_summary', article.get('original_summary', ''))
+    body = [Paragraph(escape_markup(summary), styles['body'])]
     
-    article_title_style = ParagraphStyle(
-        'ArticleTitle',
-        parent=styles['Heading2'],
-        fontName=font_bold,
-        fontSize=14,
-        textColor=primary,
-        spaceBefore=15,
-        spaceAfter=6
-    )
+    link = article.get('link', '')
+    if link:
+        safe_link = link.replace('&', '&amp;')
+        link_text = f'<a href="{safe_link}" color="blue"><u>Read full article</u></a>'
+        body.append(Paragraph(link_text, styles['link']))
     
-    source_style = ParagraphStyle(
-        'SourceStyle',
-        parent=styles['Normal'],
-        fontName=font_family,
-        fontSize=9,
-        textColor=secondary,
-        spaceAfter=6
-    )
+    return header, body
+
+def get_article_flowables(article, theme):
+    """Article paragraphs from the flowable cache, keyed by article content and theme.
+
+    Parsing the markup is the costly part of a Paragraph, so parsed
+    paragraphs are kept and every PDF gets shallow copies of them;
+    layout state set while building one document never leaks into another.
+    """
+    key = (article_key(article), theme)
+    with _flowable_cache_lock:
+        cached = _flowable_cache.get(key)
+        if cached is not None:
+            _flowable_cache.move_to_end(key)
     
-    body_style = ParagraphStyle(
-        'BodyStyle',
-        parent=styles['Normal'],
-        fontName=font_family,
-        fontSize=11,
-        textColor=colors.black,
-        alignment=TA_JUSTIFY,
-        spaceAfter=8,
-        leading=14
-    )
+    if cached is None:
+        cached = build_article_flowables(article, get_pdf_styles(*theme))
+        with _flowable_cache_lock:
+            _flowable_cache[key] = cached
+            while len(_flowable_cache) > PDF_FLOWABLE_CACHE_SIZE:
+                _flowable_cache.popitem(last=False)
+    
+    header, body = cached
+    return [copy.copy(f) for f in header], [copy.copy(f) for f in body]
+
+def clear_render_caches():
+    """Drop the cached styles and article flowables."""
+    get_pdf_styles.cache_clear()
+    with _flowable_cache_lock:
+        _flowable_cache.clear()
+
+def profile_settings(profile=None):
+    return PDF_PROFILES.get(profile or PDF_PROFILE, PDF_PROFILES['standard'])
+
+def generate_pdf(articles, output_path, primary_color='#1a73e8', secondary_color='#4285f4', font_style='modern', overall_summary='', profile=None, edition_date=None):
+    """Generate a styled PDF newsletter with links and images.
+
+    ``profile`` (default PDF_PROFILE) picks the output size trade-off from
+    PDF_PROFILES: 'standard', 'compact' (smaller, lower quality images) or
+    'text' (no images). ``edition_date`` is printed under the title
+    (default today).
+    """
+    profile = profile or PDF_PROFILE
+    settings = profile_settings(profile)
+    
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
-    link_style = ParagraphStyle(
-        'LinkStyle',
-        parent=styles['Normal'],
-        fontName=font_family,
-        fontSize=10,
-        textColor=secondary,
-        spaceAfter=12
+    thumbnails = {}
+    if settings['images']:
+        max_width, max_height = settings['image_size']
+        thumbnails = prefetch_images(
+            (article.get('image_url', '') for article in articles),
+            max_width=max_width, max_height=max_height, quality=settings['jpeg_quality']
+        )
+    
+    doc = SimpleDocTemplate(
+        output_path,
+        pagesize=letter,
+        pageCompression=1,
+        rightMargin=0.75*inch,
+        leftMargin=0.75*inch,
+        topMargin=0.75*inch,
+        bottomMargin=0.75*inch
     )
     
+    theme = (primary_color, secondary_color, font_style)
+    styles = get_pdf_styles(*theme)
+    primary = styles['primary']
+    secondary = styles['secondary']
+    
     elements = []
     
-    elements.append(Paragraph("Your Daily Newsletter", title_style))
-    elements.append(Paragraph(datetime.now().strftime("%B %d, %Y"), date_style))
+    elements.append(Paragraph("Your Daily Newsletter", styles['title']))
+    elements.append(Paragraph((edition_date or datetime.now()).strftime("%B %d, %Y"), styles['date']))
     
     elements.append(HRFlowable(
         width="100%",
@@ -160,32 +321,14 @@ def generate_pdf(articles, output_path, primary_color='#1a73e8', secondary_color
     ))
     
     if overall_summary:
-        elements.append(Paragraph("<b>Today's Highlights</b>", ParagraphStyle(
-            'HighlightTitle',
-            parent=styles['Normal'],
-            fontName=font_bold,
-            fontSize=14,
-            textColor=primary,
-            spaceAfter=10
-        )))
-        safe_summary = overall_summary.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-        elements.append(Paragraph(safe_summary, summary_style))
+        elements.append(Paragraph("<b>Today's Highlights</b>", styles['highlight']))
+        elements.append(Paragraph(escape_markup(overall_summary), styles['summary']))
         elements.append(Spacer(1, 10))
     
     if articles:
-        intro_style = ParagraphStyle(
-            'IntroStyle',
-            parent=styles['Normal'],
-            fontName=font_family,
-            fontSize=12,
-            textColor=colors.darkgray,
-            alignment=TA_CENTER,
-            spaceAfter=25
-        )
-        
         elements.append(Paragraph(
             f"Today's edition features {len(articles)} curated articles just for you.",
-            intro_style
+            styles['intro']
         ))
     
     for i, article in enumerate(articles):
@@ -199,29 +342,17 @@ def generate_pdf(articles, output_path, primary_color='#1a73e8', secondary_color
                 spaceAfter=15
             ))
         
-        safe_title = article.get('title', 'Untitled').replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-        elements.append(Paragraph(safe_title, article_title_style))
+        header, body = get_article_flowables(article, theme)
+        elements.extend(header)
         
-        source_text = f"{article.get('source', 'Unknown')} | {article.get('published', 'Today')}"
-        elements.append(Paragraph(source_text, source_style))
+        thumbnail = thumbnails.get(article.get('image_url', ''))
+        if thumbnail:
+            path, width, height = thumbnail
+            elements.append(Spacer(1, 5))
+            elements.append(Image(path, width=width, height=height))
+            elements.append(Spacer(1, 5))
         
-        image_url = article.get('image_url', '')
-        if image_url:
-            img = download_image(image_url)
-            if img:
-                elements.append(Spacer(1, 5))
-                elements.append(img)
-                elements.append(Spacer(1, 5))
-        
-        summary = article.get('simplified_summary', article.get('original_summary', ''))
-        safe_summary = summary.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-        elements.append(Paragraph(safe_summary, body_style))
-        
-        link = article.get('link', '')
-        if link:
-            safe_link = link.replace('&', '&amp;')
-            link_text = f'<a href="{safe_link}" color="blue"><u>Read full article</u></a>'
-            elements.append(Paragraph(link_text, link_style))
+        elements.extend(body)
     
     elements.append(Spacer(1, 30))
     elements.append(HRFlowable(
@@ -232,19 +363,83 @@ def generate_pdf(articles, output_path, primary_color='#1a73e8', secondary_color
         spaceAfter=10
     ))
     
-    footer_style = ParagraphStyle(
-        'FooterStyle',
-        parent=styles['Normal'],
-        fontName=font_family,
-        fontSize=9,
-        textColor=colors.gray,
-        alignment=TA_CENTER
-    )
     elements.append(Paragraph(
         "Generated by Your Personal Newsletter App",
-        footer_style
+        styles['footer']
     ))
     
     doc.build(elements)
     
     return output_path
+
+def log_pdf_size(path, profile=None):
+    """Log a finished PDF's size; called once the file is at its final path."""
+    print(f"PDF written to {path}: {os.path.getsize(path) / 1024:.1f} KB ({profile or PDF_PROFILE} profile)")
+
+def get_render_pool():
+    """Shared process pool for bulk rendering, started on first use.
+
+    Workers are spawned rather than forked so they don't inherit the web
+    server's threads and held locks. They stay up between calls and keep
+    their style and flowable caches warm. A spawned worker re-runs the
+    top level of the program's main module, so under ``python app.py``
+    each one repeats app.py's database setup (``create_all`` and the
+    column migrations) once when it starts; the ingester and the server
+    only start under ``__main__`` and don't run in workers.
+    """
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = ProcessPoolExecutor(
+                max_workers=PDF_RENDER_PROCESSES,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _render_pool
+
+def reset_render_pool():
+    """Shut down the shared pool; the next bulk render starts a fresh one."""
+    global _render_pool
+    with _render_pool_lock:
+        pool, _render_pool = _render_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def render_pdf_job(job):
+    """Render one bulk job in a worker process."""
+    output_path = generate_pdf(**job)
+    log_pdf_size(output_path, job.get('profile'))
+    return output_path
+
+def render_pdfs(jobs):
+    """Render many PDFs on the process pool, yielding ``(output_path, error)`` as each finishes.
+
+    Each job is a dict of generate_pdf keyword arguments (``articles``,
+    ``output_path`` and optionally the theme and ``overall_summary``) and
+    must be picklable. Images for every job are fetched once up front so
+    the workers find them in the image cache. ``error`` is None on success.
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return
+    
+    image_urls = {}
+    for job in jobs:
+        settings = profile_settings(job.get('profile'))
+        if settings['images']:
+            key = (settings['image_size'], settings['jpeg_quality'])
+            image_urls.setdefault(key, []).extend(article.get('image_url', '') for article in job['articles'])
+    for ((max_width, max_height), quality), urls in image_urls.items():
+        prefetch_images(urls, max_width=max_width, max_height=max_height, quality=quality)
+    
+    pool = get_render_pool()
+    futures = {pool.submit(render_pdf_job, job): job['output_path'] for job in jobs}
+    for future in as_completed(futures):
+        output_path = futures[future]
+        try:
+            yield future.result(), None
+        except BrokenProcessPool as e:
+            reset_render_pool()
+            yield output_path, f"render worker died: {e}"
+        except Exception as e:
+            print(f"Error rendering {output_path}: {e}")
+            yield output_path, str(e)
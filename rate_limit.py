@@ -0,0 +1,57 @@
+import threading
+import time
+
+class RateLimiter:
+    """Token-bucket limiter for request and token quotas per minute.
+
+    Two buckets are kept: one refilled at ``requests_per_minute`` and one
+    at ``tokens_per_minute``. ``acquire`` blocks until both have room for
+    the call, so concurrent callers are spread out to stay inside the
+    quota instead of bursting into 429s. ``pause`` stops every caller for
+    a while, e.g. when the server answers with Retry-After.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute=None):
+        self.request_capacity = float(requests_per_minute)
+        self.token_capacity = float(tokens_per_minute) if tokens_per_minute else None
+        self.requests = self.request_capacity
+        self.tokens = self.token_capacity
+        self.paused_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+        self.requests = min(self.request_capacity, self.requests + elapsed * self.request_capacity / 60)
+        if self.token_capacity is not None:
+            self.tokens = min(self.token_capacity, self.tokens + elapsed * self.token_capacity / 60)
+
+    def acquire(self, tokens=0):
+        """Block until one request and ``tokens`` tokens are available, then take them."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self.paused_until - now
+
+                if wait <= 0:
+                    waits = [(1 - self.requests) * 60 / self.request_capacity]
+                    if self.token_capacity is not None:
+                        # A single call larger than the bucket only waits for a full bucket
+                        needed = min(tokens, self.token_capacity)
+                        waits.append((needed - self.tokens) * 60 / self.token_capacity)
+                    wait = max(waits)
+
+                    if wait <= 0:
+                        self.requests -= 1
+                        if self.token_capacity is not None:
+                            self.tokens -= min(tokens, self.token_capacity)
+                        return
+
+            time.sleep(min(wait, 5))
+
+    def pause(self, seconds):
+        """Hold back every caller for ``seconds``."""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
@@ -0,0 +1,71 @@
+import math
+import string
+from collections import Counter, defaultdict
+
+# Punctuation becomes a word boundary; str.translate + split is much cheaper than a regex
+_PUNCTUATION = str.maketrans({c: ' ' for c in string.punctuation + '\u2018\u2019\u201c\u201d\u2013\u2014\u2026'})
+
+# Title hits count three times as much as summary hits, as in the old scorer
+TITLE_WEIGHT = 3
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+def tokenize(text):
+    """Split text into lowercase word tokens."""
+    return text.lower().translate(_PUNCTUATION).split() if text else []
+
+def topic_terms(topics):
+    """Turn a list of topics into the query terms they contain."""
+    terms = []
+    for topic in topics:
+        terms.extend(tokenize(topic))
+    return terms
+
+class InvertedIndex:
+    """BM25 postings index over a set of articles, with title tokens counted TITLE_WEIGHT times."""
+
+    def __init__(self, articles, title_weight=TITLE_WEIGHT, k1=BM25_K1, b=BM25_B):
+        self.size = len(articles)
+        self.postings = defaultdict(list)
+        self.doc_lengths = []
+
+        for doc_id, article in enumerate(articles):
+            title_tokens = tokenize(article.get('title', ''))
+            counts = Counter(tokenize(article.get('summary', '')))
+            for token in title_tokens:
+                counts[token] += title_weight
+
+            self.doc_lengths.append(sum(counts.values()))
+            for token, tf in counts.items():
+                self.postings[token].append((doc_id, tf))
+
+        total = sum(self.doc_lengths)
+        self.avg_length = total / self.size if total else 1.0
+        self.k1 = k1
+        self.norms = [k1 * (1 - b + b * length / self.avg_length) for length in self.doc_lengths]
+
+    def idf(self, term):
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (self.size - df + 0.5) / (df + 0.5))
+
+    def score(self, terms):
+        """Return one BM25 score per indexed article for the query terms."""
+        scores = [0.0] * self.size
+        norms = self.norms
+
+        for term, query_tf in Counter(terms).items():
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            weight = query_tf * self.idf(term) * (self.k1 + 1)
+            for doc_id, tf in postings:
+                scores[doc_id] += weight * tf / (tf + norms[doc_id])
+
+        return scores
+
+def score_articles(articles, topics):
+    """Score every article against the topics in one pass over an inverted index."""
+    if not articles:
+        return []
+    index = InvertedIndex(articles)
+    return index.score(topic_terms(topics))
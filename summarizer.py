@@ -1,45 +1,241 @@
 import os
+import json
+import hashlib
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from cache import SQLiteCache
+from extractive import summarize_text, summarize_collection
+from rate_limit import RateLimiter
+
+GROQ_MODEL = os.environ.get('GROQ_MODEL', 'llama-3.1-8b-instant')
+SUMMARY_CACHE_MAX_AGE = float(os.environ.get('SUMMARY_CACHE_MAX_AGE', 7 * 24 * 3600))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.environ.get('SUMMARY_CACHE_MAX_ENTRIES', 10000))
+SUMMARY_BATCH_SIZE = int(os.environ.get('SUMMARY_BATCH_SIZE', 1))
+SUMMARY_WORKERS = int(os.environ.get('SUMMARY_WORKERS', 4))
+GROQ_BASE_URL = os.environ.get('GROQ_BASE_URL') or None
+GROQ_REQUESTS_PER_MINUTE = float(os.environ.get('GROQ_REQUESTS_PER_MINUTE', 30))
+GROQ_TOKENS_PER_MINUTE = float(os.environ.get('GROQ_TOKENS_PER_MINUTE', 6000))
+GROQ_MAX_RETRIES = int(os.environ.get('GROQ_MAX_RETRIES', 3))
+SUMMARY_BACKEND = os.environ.get('SUMMARY_BACKEND', 'groq').strip().lower()
+OVERALL_SUMMARY_GROUP_SIZE = int(os.environ.get('OVERALL_SUMMARY_GROUP_SIZE', 10))
+
+OVERALL_INSTRUCTIONS = """Based on these news articles, write a brief 3-4 sentence executive summary highlighting the main themes and most important stories of the day. Make it engaging and informative."""
+GROUP_INSTRUCTIONS = """Summarize the most important stories in these news articles in 2-3 sentences, keeping the key facts."""
+MERGE_INSTRUCTIONS = """These are summaries of groups of today's news articles. Combine them into a brief 3-4 sentence executive summary highlighting the main themes and most important stories of the day. Make it engaging and informative."""
+
+summary_cache = SQLiteCache('summaries', max_age=SUMMARY_CACHE_MAX_AGE, max_entries=SUMMARY_CACHE_MAX_ENTRIES)
+groq_limiter = RateLimiter(GROQ_REQUESTS_PER_MINUTE, GROQ_TOKENS_PER_MINUTE)
+
+_groq_client = None
+_groq_client_key = None
+_groq_client_lock = threading.Lock()
+
+def summary_cache_key(kind, content, prompt=''):
+    """Cache key for an LLM summary: content hash + user prompt + model name."""
+    payload = json.dumps([kind, GROQ_MODEL, prompt.strip(), content], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
 
 def get_groq_client():
-    """Get Groq client if API key is available."""
+    """Get Groq client if API key is available.
+
+    One client is shared by every call so its connection pool is reused.
+    Retries are left to chat_completion so they go through the rate limiter.
+    GROQ_BASE_URL points the client at another server, such as a local stub.
+    """
+    global _groq_client, _groq_client_key
     api_key = os.environ.get('GROQ_API_KEY')
-    if api_key:
-        from groq import Groq
-        return Groq(api_key=api_key)
-    return None
+    if not api_key:
+        return None
+    
+    with _groq_client_lock:
+        if _groq_client is None or _groq_client_key != api_key:
+            from groq import Groq
+            _groq_client = Groq(api_key=api_key, base_url=GROQ_BASE_URL, max_retries=0)
+            _groq_client_key = api_key
+        return _groq_client
+
+def estimate_tokens(messages, max_tokens):
+    """Rough token cost of a chat request (about four characters per token)."""
+    return sum(len(m['content']) for m in messages) // 4 + max_tokens
+
+def is_transient_error(error):
+    """True for failures the Groq SDK would retry: timeouts, dropped connections, 408/409 and 5xx."""
+    from groq import APIConnectionError
+    if isinstance(error, APIConnectionError):
+        return True
+    status = getattr(error, 'status_code', None)
+    return status in (408, 409) or (status is not None and status >= 500)
+
+def retry_after_seconds(error, attempt):
+    """Seconds to wait before retrying a rate-limited call, or None if it wasn't a 429."""
+    response = getattr(error, 'response', None)
+    status = getattr(error, 'status_code', None) or getattr(response, 'status_code', None)
+    if status != 429:
+        return None
+    
+    value = response.headers.get('retry-after') if response is not None else None
+    if value:
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            try:
+                return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+            except (TypeError, ValueError):
+                pass
+    return float(2 ** attempt)
+
+def chat_completion(client, messages, max_tokens, temperature, **kwargs):
+    """Run a Groq chat completion under the shared rate limiter.
+
+    Each call first takes its request and estimated tokens from the
+    limiter. On a 429 every caller is paused for the server's Retry-After
+    (or an exponential backoff); timeouts, connection errors and 5xx
+    responses back off this call only. Either way the call goes back
+    through the limiter and is retried up to GROQ_MAX_RETRIES times.
+    """
+    tokens = estimate_tokens(messages, max_tokens)
+    
+    for attempt in range(GROQ_MAX_RETRIES + 1):
+        groq_limiter.acquire(tokens)
+        try:
+            return client.chat.completions.create(
+                model=GROQ_MODEL,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                **kwargs
+            )
+        except Exception as e:
+            if attempt == GROQ_MAX_RETRIES:
+                raise
+            wait = retry_after_seconds(e, attempt)
+            if wait is not None:
+                print(f"Groq rate limit hit, retrying in {wait:.1f}s")
+                groq_limiter.pause(wait)
+            elif is_transient_error(e):
+                wait = min(0.5 * 2 ** attempt, 8.0)
+                print(f"Groq request failed ({e}), retrying in {wait:.1f}s")
+                time.sleep(wait)
+            else:
+                raise
+
+class SummaryBackend(ABC):
+    """A summarization engine.
+
+    ``summarize`` returns one summary per article in input order (None
+    keeps the feed's own text); ``overall`` returns the edition's
+    executive summary. Engines are looked up by ``name`` in
+    SUMMARY_BACKENDS.
+    """
+    name = ''
+    
+    @abstractmethod
+    def summarize(self, articles, prompt='', batch_size=None, workers=None):
+        pass
+    
+    @abstractmethod
+    def overall(self, articles, prompt=''):
+        pass
+
+class GroqBackend(SummaryBackend):
+    """Abstractive summaries from the Groq API, falling back to extraction."""
+    name = 'groq'
+    
+    def summarize(self, articles, prompt='', batch_size=None, workers=None):
+        return groq_summaries(articles, prompt, batch_size, workers)
+    
+    def overall(self, articles, prompt=''):
+        return groq_overall_summary(articles, prompt)
 
-def summarize_articles(articles, prompt=''):
-    """Summarize and simplify news articles using Groq (free LLM)."""
+class ExtractiveBackend(SummaryBackend):
+    """Local sentence extraction: no network or API key, the prompt is ignored."""
+    name = 'extractive'
+    
+    def summarize(self, articles, prompt='', batch_size=None, workers=None):
+        return [create_simple_summary(article) for article in articles]
+    
+    def overall(self, articles, prompt=''):
+        return extractive_overall_summary(articles)
+
+SUMMARY_BACKENDS = {backend.name: backend for backend in (GroqBackend(), ExtractiveBackend())}
+
+def get_summary_backend(name=None):
+    """Return the backend called ``name`` (default SUMMARY_BACKEND)."""
+    name = (name or SUMMARY_BACKEND).lower()
+    if name not in SUMMARY_BACKENDS:
+        print(f"Unknown summary backend '{name}', using groq")
+        name = 'groq'
+    return SUMMARY_BACKENDS[name]
+
+def summarize_articles(articles, prompt='', batch_size=None, workers=None, backend=None):
+    """Summarize and simplify news articles.
+
+    ``backend`` names the engine to use (default SUMMARY_BACKEND: 'groq'
+    for the LLM, 'extractive' for the local summarizer). Output order
+    matches the input.
+    """
     if not articles:
         return []
     
+    summaries = get_summary_backend(backend).summarize(articles, prompt, batch_size, workers)
+    
     summarized = []
+    for article, summary in zip(articles, summaries):
+        summarized.append({
+            'title': article['title'],
+            'original_summary': article['summary'],
+            'simplified_summary': summary if summary is not None else article['summary'],
+            'source': article['source'],
+            'published': article['published'],
+            'link': article.get('link', ''),
+            'image_url': article.get('image_url', ''),
+            'also_reported_by': article.get('also_reported_by', [])
+        })
+    
+    return summarized
+
+def groq_summaries(articles, prompt='', batch_size=None, workers=None):
+    """Summaries for ``articles`` from Groq (free LLM), None where a call failed.
+
+    Articles are summarized concurrently on up to ``workers`` threads
+    (default SUMMARY_WORKERS); every Groq call still passes through the
+    shared rate limiter. With ``batch_size`` above 1 (default
+    SUMMARY_BATCH_SIZE) articles are sent in groups of that size, one
+    request per group.
+    """
+    batch_size = SUMMARY_BATCH_SIZE if batch_size is None else batch_size
+    workers = SUMMARY_WORKERS if workers is None else workers
+    
+    def run_batch(chunk):
+        try:
+            return summarize_batch(chunk, prompt=prompt)
+        except Exception as e:
+            print(f"Error summarizing batch: {e}")
+            return [None] * len(chunk)
     
-    for article in articles:
+    def run_single(article):
         try:
-            summary = summarize_single_article(article, prompt=prompt)
-            summarized.append({
-                'title': article['title'],
-                'original_summary': article['summary'],
-                'simplified_summary': summary,
-                'source': article['source'],
-                'published': article['published'],
-                'link': article.get('link', ''),
-                'image_url': article.get('image_url', '')
-            })
+            return summarize_single_article(article, prompt=prompt)
         except Exception as e:
             print(f"Error summarizing article: {e}")
-            summarized.append({
-                'title': article['title'],
-                'original_summary': article['summary'],
-                'simplified_summary': article['summary'],
-                'source': article['source'],
-                'published': article['published'],
-                'link': article.get('link', ''),
-                'image_url': article.get('image_url', '')
-            })
+            return None
     
-    return summarized
+    summaries = [None] * len(articles)
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        if batch_size > 1:
+            starts = list(range(0, len(articles), batch_size))
+            chunks = [articles[start:start + batch_size] for start in starts]
+            for start, results in zip(starts, executor.map(run_batch, chunks)):
+                summaries[start:start + len(results)] = results
+        
+        missing = [i for i, summary in enumerate(summaries) if summary is None]
+        for i, summary in zip(missing, executor.map(run_single, [articles[i] for i in missing])):
+            summaries[i] = summary
+    
+    return summaries
 
 def summarize_single_article(article, prompt=''):
     """Summarize a single article using Groq's free LLM API."""
@@ -48,6 +244,11 @@ def summarize_single_article(article, prompt=''):
     if not client:
         return create_simple_summary(article)
     
+    cache_key = summary_cache_key('article', [article['title'], article['summary']], prompt)
+    cached = summary_cache.get(cache_key)
+    if cached:
+        return cached[0]
+    
     try:
         user_prompt = prompt.strip()
         base_prompt = """Summarize this news article in 2-3 clear, simple sentences that anyone can understand. 
@@ -63,8 +264,8 @@ Content: {article['summary']}
 
 Summary:"""
 
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
+        response = chat_completion(
+            client,
             messages=[
                 {"role": "system", "content": "You are a helpful assistant that summarizes news articles in simple, clear language."},
                 {"role": "user", "content": base_prompt}
@@ -73,73 +274,230 @@ Summary:"""
             temperature=0.7
         )
         
-        return response.choices[0].message.content.strip()
+        summary = response.choices[0].message.content.strip()
+        summary_cache.set(cache_key, summary)
+        return summary
         
     except Exception as e:
         print(f"Groq API error: {e}")
         return create_simple_summary(article)
 
+def summarize_batch(articles, prompt=''):
+    """Summarize several articles with a single Groq request.
+
+    The articles are numbered in one prompt and the model is asked for a
+    JSON object mapping each number to its summary. Cached summaries are
+    reused, and any article missing from the reply (or the whole batch if
+    the reply can't be parsed) falls back to summarize_single_article.
+    Returns one summary per article, in order.
+    """
+    client = get_groq_client()
+    
+    if not client:
+        return [create_simple_summary(article) for article in articles]
+    
+    summaries = [None] * len(articles)
+    cache_keys = [summary_cache_key('article', [a['title'], a['summary']], prompt) for a in articles]
+    pending = []
+    for i, cache_key in enumerate(cache_keys):
+        cached = summary_cache.get(cache_key)
+        if cached:
+            summaries[i] = cached[0]
+        else:
+            pending.append(i)
+    
+    if len(pending) > 1:
+        try:
+            user_prompt = prompt.strip()
+            base_prompt = """Summarize each of the following news articles in 2-3 clear, simple sentences that anyone can understand. 
+Avoid jargon and technical terms. Make each summary engaging and informative."""
+            if user_prompt:
+                base_prompt += f"\n\nUser prompt: {user_prompt}"
+            
+            for number, i in enumerate(pending, 1):
+                base_prompt += f"""
+
+Article {number}
+Title: {articles[i]['title']}
+Content: {articles[i]['summary']}"""
+            
+            base_prompt += """
+
+Respond with only a JSON object of the form {"summaries": [{"id": 1, "summary": "..."}, ...]} with one entry per article."""
+
+            response = chat_completion(
+                client,
+                messages=[
+                    {"role": "system", "content": "You are a helpful assistant that summarizes news articles in simple, clear language. You always reply with valid JSON."},
+                    {"role": "user", "content": base_prompt}
+                ],
+                max_tokens=150 * len(pending) + 50,
+                temperature=0.7,
+                response_format={"type": "json_object"}
+            )
+            
+            parsed = parse_batch_response(response.choices[0].message.content)
+            for number, i in enumerate(pending, 1):
+                summary = parsed.get(number)
+                if summary:
+                    summaries[i] = summary
+                    summary_cache.set(cache_keys[i], summary)
+                    
+        except Exception as e:
+            print(f"Groq batch API error: {e}")
+    
+    for i, summary in enumerate(summaries):
+        if summary is None:
+            summaries[i] = summarize_single_article(articles[i], prompt=prompt)
+    
+    return summaries
+
+def parse_batch_response(content):
+    """Map article numbers to summaries from a batch reply. Returns {} if unparseable."""
+    try:
+        data = json.loads(content)
+    except (TypeError, ValueError):
+        return {}
+    
+    if isinstance(data, dict) and isinstance(data.get('summaries'), list):
+        items = data['summaries']
+    elif isinstance(data, list):
+        items = data
+    elif isinstance(data, dict):
+        items = [{'id': key, 'summary': value} for key, value in data.items()]
+    else:
+        return {}
+    
+    parsed = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            number = int(item.get('id'))
+        except (TypeError, ValueError):
+            continue
+        summary = item.get('summary')
+        if isinstance(summary, str) and summary.strip():
+            parsed[number] = summary.strip()
+    return parsed
+
 def create_simple_summary(article):
-    """Create a simple summary without AI (fallback)."""
+    """Create a simple summary without AI (fallback).
+
+    Long summaries are cut down to their two most central sentences.
+    """
     summary = article.get('summary', '')
     
     if len(summary) > 200:
-        sentences = summary.split('.')
-        short_summary = '. '.join(sentences[:2])
-        if short_summary and not short_summary.endswith('.'):
-            short_summary += '.'
-        return short_summary
+        return summarize_text(summary, max_sentences=2)
     
     return summary
 
-def generate_overall_summary(articles, prompt=''):
+def extractive_overall_summary(articles):
+    """Overall summary built from the most central sentences of the stories."""
+    texts = [a.get('simplified_summary', a.get('summary', '')) for a in articles]
+    highlights = summarize_collection(texts, max_sentences=3)
+    if highlights:
+        return f"Today's newsletter covers {len(articles)} stories. {highlights}"
+    titles = [a.get('title', '') for a in articles[:3]]
+    return f"Today's newsletter covers {len(articles)} stories including: {', '.join(titles)}."
+
+def generate_overall_summary(articles, prompt='', backend=None):
     """Generate an overall summary of all news articles."""
-    client = get_groq_client()
-    
     if not articles:
         return "No articles available for summary."
     
-    if not client:
-        titles = [a.get('title', '') for a in articles[:5]]
-        return f"Today's newsletter covers {len(articles)} stories including: {', '.join(titles[:3])}."
+    return get_summary_backend(backend).overall(articles, prompt)
+
+def article_briefs(articles, start=1):
+    """Numbered "title: summary" lines for the overall summary prompts."""
+    briefs = []
+    for i, article in enumerate(articles, start):
+        title = article.get('title', 'Untitled')
+        summary = article.get('simplified_summary', article.get('summary', ''))[:200]
+        briefs.append(f"{i}. {title}: {summary}")
+    return "\n".join(briefs)
+
+def editor_completion(client, kind, instructions, label, material, prompt='', max_tokens=200):
+    """Ask Groq to summarize ``material`` as the news editor, with caching."""
+    cache_key = summary_cache_key(kind, material, prompt)
+    cached = summary_cache.get(cache_key)
+    if cached:
+        return cached[0]
     
-    try:
-        article_briefs = []
-        for i, article in enumerate(articles[:10], 1):
-            title = article.get('title', 'Untitled')
-            summary = article.get('simplified_summary', article.get('summary', ''))[:200]
-            article_briefs.append(f"{i}. {title}: {summary}")
-        
-        all_briefs = "\n".join(article_briefs)
-        
-        user_prompt = prompt.strip()
-        base_prompt = """Based on these news articles, write a brief 3-4 sentence executive summary highlighting the main themes and most important stories of the day. Make it engaging and informative."""
-        if user_prompt:
-            base_prompt += f"\n\nUser prompt: {user_prompt}"
+    user_prompt = prompt.strip()
+    base_prompt = instructions
+    if user_prompt:
+        base_prompt += f"\n\nUser prompt: {user_prompt}"
 
-        base_prompt += f"""
+    base_prompt += f"""
 
-Articles:
-{all_briefs}
+{label}:
+{material}
 
 Overall Summary:"""
 
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": "You are a news editor who writes concise, engaging daily news briefings."},
-                {"role": "user", "content": base_prompt}
-            ],
-            max_tokens=200,
-            temperature=0.7
-        )
+    response = chat_completion(
+        client,
+        messages=[
+            {"role": "system", "content": "You are a news editor who writes concise, engaging daily news briefings."},
+            {"role": "user", "content": base_prompt}
+        ],
+        max_tokens=max_tokens,
+        temperature=0.7
+    )
+    
+    summary = response.choices[0].message.content.strip()
+    summary_cache.set(cache_key, summary)
+    return summary
+
+def groq_overall_summary(articles, prompt='', group_size=None, workers=None):
+    """Overall summary written by Groq, or extracted locally without it.
+
+    Editions of up to ``group_size`` articles (default
+    OVERALL_SUMMARY_GROUP_SIZE) are summarized in one call. Larger ones
+    are split into groups that are summarized in parallel, and the group
+    summaries are then merged in a final call, so every story is read
+    while each request stays small.
+    """
+    client = get_groq_client()
+    
+    if not client:
+        return extractive_overall_summary(articles)
+    
+    group_size = max(OVERALL_SUMMARY_GROUP_SIZE if group_size is None else group_size, 1)
+    workers = SUMMARY_WORKERS if workers is None else workers
+    
+    try:
+        if len(articles) <= group_size:
+            return editor_completion(
+                client, 'overall', OVERALL_INSTRUCTIONS, 'Articles', article_briefs(articles), prompt
+            )
         
-        return response.choices[0].message.content.strip()
+        starts = list(range(0, len(articles), group_size))
+        
+        def summarize_group(start):
+            group = articles[start:start + group_size]
+            try:
+                return editor_completion(
+                    client, 'overall-group', GROUP_INSTRUCTIONS, 'Articles',
+                    article_briefs(group, start + 1), prompt, max_tokens=150
+                )
+            except Exception as e:
+                print(f"Error summarizing article group: {e}")
+                return summarize_collection(
+                    [a.get('simplified_summary', a.get('summary', '')) for a in group], max_sentences=2
+                )
+        
+        with ThreadPoolExecutor(max_workers=max(min(workers, len(starts)), 1)) as executor:
+            sections = [s for s in executor.map(summarize_group, starts) if s]
+        
+        material = "\n".join(f"Group {i}: {section}" for i, section in enumerate(sections, 1))
+        return editor_completion(client, 'overall-merge', MERGE_INSTRUCTIONS, 'Group summaries', material, prompt)
         
     except Exception as e:
         print(f"Error generating overall summary: {e}")
-        titles = [a.get('title', '') for a in articles[:3]]
-        return f"Today's newsletter covers {len(articles)} stories including: {', '.join(titles)}."
+        return extractive_overall_summary(articles)
 
 def generate_newsletter_intro(topics, article_count):
     """Generate a newsletter introduction."""
@@ -152,8 +510,8 @@ def generate_newsletter_intro(topics, article_count):
         prompt = f"""Write a brief, friendly 1-2 sentence introduction for a newsletter about: {', '.join(topics)}.
 It should mention there are {article_count} articles. Keep it warm and engaging."""
 
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
+        response = chat_completion(
+            client,
             messages=[
                 {"role": "system", "content": "You are a friendly newsletter writer."},
                 {"role": "user", "content": prompt}